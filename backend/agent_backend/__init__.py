@@ -1,7 +1,7 @@
 """Backend package for the sample file-editing agent."""
 
 from .agent import agent, WORKSPACE_ROOT, ToolRunState, push_run_state, pop_run_state
-from .agent import safe_read_text
+from .agent import safe_read_text, safe_read_text_async
 
 __all__ = [
     "agent",
@@ -10,4 +10,5 @@ __all__ = [
     "push_run_state",
     "pop_run_state",
     "safe_read_text",
+    "safe_read_text_async",
 ]
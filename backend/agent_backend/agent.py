@@ -1,40 +1,88 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import mmap
 import os
 import re
+import sys
+import time
+from collections import OrderedDict, deque
 from contextvars import ContextVar, Token
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Deque, List, Optional
 
+import aiofiles
+import aiofiles.os
 from pydantic_ai import Agent, RunContext
 
+try:  # optional fast path for locating many search blocks in one pass
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
 from .file_client import HTTPFileClient
 from .edit_versioning import EditVersionManager, EditSource, EditType, ConflictResolutionStrategy
 
 logger = logging.getLogger(__name__)
 
+
+class _Snippet:
+    """Lazy repr of a content prefix; slices only if the log line renders."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __repr__(self) -> str:
+        return repr(self.text[:100])
+
 WORKSPACE_ROOT = Path(
     os.getenv("AGENT_WORKSPACE_ROOT", Path(__file__).resolve().parents[2])
 ).resolve()
 DEFAULT_FILE_ENCODING = os.getenv("AGENT_FILE_ENCODING", "utf-8")
 MAX_FILE_BYTES = int(os.getenv("AGENT_MAX_FILE_BYTES", "200000"))
 MODEL_NAME = os.getenv("AGENT_MODEL", os.getenv("MODEL_NAME", "openai:gpt-4o"))
+ACTIONS_MAX = int(os.getenv("AGENT_ACTIONS_MAX", "1024"))
+LIST_FILES_TTL = float(os.getenv("AGENT_LIST_FILES_TTL", "2.0"))
 DEFAULT_FILE = Path("files/__init__.py")
 FILE_STORE_URL = os.getenv("FILE_STORE_URL")
 
+# Workspace root cached as strings so hot paths can check containment or strip
+# the prefix with a slice instead of Path.resolve/relative_to syscalls.
+_WORKSPACE_STR = str(WORKSPACE_ROOT)
+_WORKSPACE_PREFIX = _WORKSPACE_STR + os.sep
+
 # Global edit version manager
 _edit_version_manager: Optional[EditVersionManager] = None
 
-def get_edit_version_manager() -> EditVersionManager:
-    """Get or create the global edit version manager."""
+async def get_edit_version_manager() -> EditVersionManager:
+    """Get or create the global edit version manager.
+
+    Async so the first caller awaits the initial data load; everyone after
+    that gets the cached instance straight back.
+    """
     global _edit_version_manager
     if _edit_version_manager is None:
-        _edit_version_manager = EditVersionManager(WORKSPACE_ROOT)
+        _edit_version_manager = await EditVersionManager.create(WORKSPACE_ROOT)
     return _edit_version_manager
 
 
+async def aclose_edit_version_manager() -> None:
+    """Flush and stop the global edit version manager (called on app shutdown).
+
+    Without this, records still sitting in the debounced writer's queue
+    would be dropped on a graceful shutdown.
+    """
+    global _edit_version_manager
+    if _edit_version_manager is not None:
+        await _edit_version_manager.aclose()
+        _edit_version_manager = None
+
+
 @dataclass
 class ToolRunState:
     """Captures file interactions during a single agent run."""
@@ -42,10 +90,25 @@ class ToolRunState:
     current_file: Optional[str] = None
     last_path: Optional[str] = None
     last_content: Optional[str] = None
-    actions: list[str] = field(default_factory=list)
-
-    def record(self, path: Path, content: str, action: str) -> None:
-        relative = str(path.relative_to(WORKSPACE_ROOT))
+    actions: Deque[str] = field(default_factory=lambda: deque(maxlen=ACTIONS_MAX))
+    # Memoized raw path -> workspace-relative path; a run touches the same
+    # few files repeatedly, so conversions beyond the first are dict hits.
+    _rel_cache: dict[str, str] = field(default_factory=dict, repr=False)
+
+    def actions_list(self) -> list[str]:
+        """Snapshot of the recorded actions for callers needing list semantics."""
+
+        return list(self.actions)
+
+    def record(self, path: Path | str, content: str, action: str) -> None:
+        raw = os.fspath(path)
+        relative = self._rel_cache.get(raw)
+        if relative is None:
+            if raw.startswith(_WORKSPACE_PREFIX):
+                relative = raw[len(_WORKSPACE_PREFIX):]
+            else:
+                relative = str(Path(raw).relative_to(WORKSPACE_ROOT))
+            self._rel_cache[raw] = relative
         self.last_path = relative
         self.last_content = content
         self.actions.append(action)
@@ -66,39 +129,94 @@ def pop_run_state(token: Token) -> None:
     _run_state.reset(token)
 
 
-def _current_state() -> Optional[ToolRunState]:
-    return _run_state.get()
-
-
 def _resolve_user_path(raw_path: str) -> Path:
-    candidate = (WORKSPACE_ROOT / raw_path).resolve()
-    if not candidate.is_relative_to(WORKSPACE_ROOT):
+    # normpath folds any '..' segments lexically, so the prefix check below is
+    # sufficient without resolve()'s per-component symlink stat walk.
+    norm = os.path.normpath(os.path.join(_WORKSPACE_STR, raw_path))
+    if norm != _WORKSPACE_STR and not norm.startswith(_WORKSPACE_PREFIX):
         raise ValueError("File access outside the workspace root is not allowed")
-    return candidate
+    return Path(norm)
 
 
-def _guard_file_size(path: Path) -> None:
-    if not path.exists():
-        return
-    if path.stat().st_size > MAX_FILE_BYTES:
-        raise ValueError("File is larger than the configured MAX_FILE_BYTES limit")
+# Files above this size are read via mmap in a worker thread; below it the
+# page-cache copy through a plain read is cheaper than the mapping setup.
+_MMAP_READ_THRESHOLD = 64 * 1024
 
 
-def safe_read_text(path: str, encoding: Optional[str] = None) -> tuple[str, Path]:
-    """Read a text file ensuring it is inside the workspace."""
+def _read_bytes_mmap(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[:]
+
+
+# Decoded text keyed by (resolved path, st_mtime_ns, st_size): a stale entry can
+# never be served because any on-disk change alters the key.
+_READ_CACHE_MAX = 64
+_read_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+
+
+def clear_read_file_cache() -> None:
+    """Drop all cached file contents (primarily for tests)."""
+
+    _read_cache.clear()
+
+
+def _invalidate_read_cache(path: Path | str) -> None:
+    key_path = os.fspath(path)
+    for key in [k for k in _read_cache if k[0] == key_path]:
+        del _read_cache[key]
+
+
+async def safe_read_text_async(path: str, encoding: Optional[str] = None) -> tuple[str, Path]:
+    """Read a text file ensuring it is inside the workspace without blocking the loop."""
 
     file_path = _resolve_user_path(path)
-    if not file_path.exists():
-        raise FileNotFoundError(f"File '{path}' does not exist")
+    try:
+        st = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File '{path}' does not exist") from None
+    if st.st_size > MAX_FILE_BYTES:
+        raise ValueError("File is larger than the configured MAX_FILE_BYTES limit")
 
-    _guard_file_size(file_path)
-    text = file_path.read_text(encoding=encoding or DEFAULT_FILE_ENCODING)
+    key = (str(file_path), st.st_mtime_ns, st.st_size)
+    cached = _read_cache.get(key)
+    if cached is not None:
+        _read_cache.move_to_end(key)
+        return cached, file_path
+
+    # Read raw bytes and decode once; bounding the read at MAX_FILE_BYTES + 1
+    # doubles as the size guard without a separate stat. Large files go
+    # through a single mmap copy in a worker thread instead of buffered reads.
+    if st.st_size > _MMAP_READ_THRESHOLD:
+        data = await asyncio.to_thread(_read_bytes_mmap, file_path)
+    else:
+        async with aiofiles.open(file_path, "rb") as f:
+            data = await f.read(MAX_FILE_BYTES + 1)
+    if len(data) > MAX_FILE_BYTES:
+        raise ValueError("File is larger than the configured MAX_FILE_BYTES limit")
+    text = data.decode(encoding or DEFAULT_FILE_ENCODING)
+    _read_cache[key] = text
+    if len(_read_cache) > _READ_CACHE_MAX:
+        _read_cache.popitem(last=False)
     return text, file_path
 
 
-def _ensure_parent(path: Path) -> None:
+def safe_read_text(path: str, encoding: Optional[str] = None) -> tuple[str, Path]:
+    """Synchronous wrapper around safe_read_text_async for non-async callers."""
+
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(safe_read_text_async(path, encoding))
+    raise RuntimeError(
+        "safe_read_text cannot be called from a running event loop; "
+        "use 'await safe_read_text_async(...)' instead"
+    )
+
+
+def _ensure_parent(path: Path | str) -> None:
+    try:
+        os.makedirs(os.path.dirname(os.fspath(path)), exist_ok=True)
     except OSError as exc:  # pragma: no cover - defensive guard
         raise ValueError(f"Unable to prepare directories for '{path}'") from exc
 
@@ -107,6 +225,17 @@ def _use_http_store() -> bool:
     return bool(FILE_STORE_URL)
 
 
+_SR_STRICT_RE = re.compile(
+    r"<<<<<<<\s+SEARCH\s*\n(.*?)\n=======\s*\n(.*?)\n>>>>>>>\s+REPLACE\s*\n?",
+    re.DOTALL,
+)
+# More flexible fallback that tolerates missing/odd line endings around markers.
+_SR_LOOSE_RE = re.compile(
+    r"<<<<<<<\s+SEARCH\s*(.*?)\s*=======\s*(.*?)\s*>>>>>>>\s+REPLACE",
+    re.DOTALL,
+)
+
+
 def _parse_search_replace_block(block: str) -> tuple[str, str]:
     """Parse a single search/replace block in Cline format.
 
@@ -119,16 +248,14 @@ def _parse_search_replace_block(block: str) -> tuple[str, str]:
 
     Returns:
         tuple of (search_text, replace_text)
+
+    Note: callers are expected to pre-normalize CRLF line endings; this
+    function does no normalization of its own.
     """
-    block = block.replace("\r\n", "\n")
-    
-    # More flexible pattern that handles various line endings and whitespace
-    pattern = r"<<<<<<<\s+SEARCH\s*\n(.*?)\n=======\s*\n(.*?)\n>>>>>>>\s+REPLACE\s*\n?"
-    match = re.search(pattern, block, re.DOTALL)
+    match = _SR_STRICT_RE.search(block)
     if not match:
         # Try alternative pattern without strict line ending requirements
-        pattern = r"<<<<<<<\s+SEARCH\s*(.*?)\s*=======\s*(.*?)\s*>>>>>>>\s+REPLACE"
-        match = re.search(pattern, block, re.DOTALL)
+        match = _SR_LOOSE_RE.search(block)
         if not match:
             raise ValueError(
                 f"No match found or invalid search/replace block format. Expected:\n"
@@ -142,36 +269,139 @@ def _parse_search_replace_block(block: str) -> tuple[str, str]:
     return search_text, replace_text
 
 
+def _missing_search_error(content: str, search: str) -> str:
+    """Build the detailed not-found message; only invoked on the error path."""
+
+    # Locate the first line of the failed search and slice ±2 lines of context
+    # straight out of the content, instead of splitting the whole file and
+    # substring-testing every line.
+    first_line = search.split('\n', 1)[0]
+    idx = content.find(first_line) if first_line else -1
+    if idx != -1:
+        line_no = content.count('\n', 0, idx) + 1
+        start = idx
+        for _ in range(3):
+            prev = content.rfind('\n', 0, start)
+            if prev == -1:
+                start = 0
+                break
+            start = prev
+        else:
+            start += 1
+        end = idx
+        for _ in range(3):
+            nxt = content.find('\n', end)
+            if nxt == -1:
+                end = len(content)
+                break
+            end = nxt + 1
+        else:
+            end -= 1
+        context = content[start:end]
+        return (
+            f"Search text not found in file. Looking for:\n{repr(search)}\n\n"
+            f"File content around line {line_no}:\n{context}"
+        )
+
+    return (
+        f"Search text not found in file:\n{repr(search)}\n\n"
+        f"File content:\n{repr(content)}"
+    )
+
+
 def _apply_search_replace(content: str, search: str, replace: str) -> str:
     """Apply a single search/replace operation to content.
 
     Raises:
         ValueError: If search text is not found or found multiple times
     """
-    count = content.count(search)
-    if count == 0:
-        # Provide more helpful error message with context
-        lines = content.split('\n')
-        search_lines = search.split('\n')
-        if len(search_lines) == 1:
-            # Single line search - show surrounding context
-            for i, line in enumerate(lines):
-                if search in line:
-                    context_start = max(0, i - 2)
-                    context_end = min(len(lines), i + 3)
-                    context = '\n'.join(lines[context_start:context_end])
-                    raise ValueError(
-                        f"Search text not found in file. Looking for:\n{repr(search)}\n\n"
-                        f"File content around line {i+1}:\n{context}"
-                    )
-        
-        raise ValueError(
-            f"Search text not found in file:\n{repr(search)}\n\n"
-            f"File content:\n{repr(content)}"
-        )
-    if count > 1:
-        raise ValueError(f"Search text found {count} times (must be unique):\n{repr(search)}")
-    return content.replace(search, replace, 1)
+    idx = content.find(search)
+    if idx == -1:
+        raise ValueError(_missing_search_error(content, search))
+    if content.find(search, idx + len(search)) != -1:
+        raise ValueError(f"Search text found multiple times (must be unique):\n{repr(search)}")
+    return content[:idx] + replace + content[idx + len(search):]
+
+
+def _locate_matches_ahocorasick(content: str, parsed: list[tuple[str, str]]) -> list[list[int]]:
+    """Find every block's search occurrences in one linear scan of the content."""
+
+    auto = ahocorasick.Automaton()
+    for i, (search, _) in enumerate(parsed):
+        auto.add_word(search, (i, len(search)))
+    auto.make_automaton()
+    occurrences: list[list[int]] = [[] for _ in parsed]
+    for end_idx, (i, length) in auto.iter(content):
+        occurrences[i].append(end_idx - length + 1)
+    return occurrences
+
+
+def _parse_all(edit_instructions: List[str]) -> list[tuple[str, str]]:
+    """Parse every search/replace block once, reporting 1-based block numbers."""
+
+    parsed: list[tuple[str, str]] = []
+    for i, block in enumerate(edit_instructions):
+        # Normalize line endings once here so the parser and the single
+        # normalization of the file content in _apply_parsed stay in step.
+        if "\r" in block:
+            block = block.replace("\r\n", "\n")
+        try:
+            parsed.append(_parse_search_replace_block(block))
+        except ValueError as e:
+            raise ValueError(f"Error in edit instruction {i + 1}: {e}") from e
+    return parsed
+
+
+def _apply_parsed(content: str, parsed: list[tuple[str, str]]) -> str:
+    """Apply pre-parsed (search, replace) pairs to content in one splice pass.
+
+    Raises:
+        ValueError: If any edit cannot be applied
+    """
+    result = content.replace("\r\n", "\n") if "\r" in content else content
+
+    # Most edit calls carry exactly one block; skip the batch machinery.
+    if len(parsed) == 1:
+        search, replace = parsed[0]
+        try:
+            return _apply_search_replace(result, search, replace)
+        except ValueError as e:
+            raise ValueError(f"Error in edit instruction 1: {e}") from e
+
+    # Locate every search string up front, then splice all replacements in a
+    # single pass instead of rewriting the full content once per block. With
+    # pyahocorasick installed, all searches are located in one linear scan.
+    occurrences: Optional[list[list[int]]] = None
+    if ahocorasick is not None and len(parsed) > 1 and len({s for s, _ in parsed}) == len(parsed):
+        occurrences = _locate_matches_ahocorasick(result, parsed)
+
+    triples: list[tuple[int, int, str]] = []
+    for i, (search, replace) in enumerate(parsed):
+        if occurrences is not None:
+            hits = occurrences[i]
+            idx = hits[0] if len(hits) == 1 else -1
+            ambiguous = len(hits) != 1
+        else:
+            idx = result.find(search)
+            ambiguous = idx == -1 or result.find(search, idx + len(search)) != -1
+        if ambiguous:
+            try:
+                _apply_search_replace(result, search, replace)
+            except ValueError as e:
+                raise ValueError(f"Error in edit instruction {i + 1}: {e}") from e
+        triples.append((idx, len(search), replace))
+
+    triples.sort(key=lambda t: t[0])
+    parts: list[str] = []
+    cursor = 0
+    for idx, length, replace in triples:
+        if idx < cursor:
+            raise ValueError("Edit instructions overlap; search blocks must target disjoint regions")
+        parts.append(result[cursor:idx])
+        parts.append(replace)
+        cursor = idx + length
+    parts.append(result[cursor:])
+    return "".join(parts)
 
 
 def _apply_edit_instructions(content: str, edit_instructions: List[str]) -> str:
@@ -187,21 +417,46 @@ def _apply_edit_instructions(content: str, edit_instructions: List[str]) -> str:
     Raises:
         ValueError: If any edit instruction is invalid or cannot be applied
     """
-    result = content.replace("\r\n", "\n")
-    for i, block in enumerate(edit_instructions):
-        try:
-            search, replace = _parse_search_replace_block(block)
-            result = _apply_search_replace(result, search, replace)
-        except ValueError as e:
-            raise ValueError(f"Error in edit instruction {i + 1}: {e}") from e
-    return result
+    return _apply_parsed(content, _parse_all(edit_instructions))
+
+
+_file_client: Optional[HTTPFileClient] = None
+
+# Short-lived cache for the store listing so bursts of list_files calls within
+# one agent turn cost a single round-trip; any write drops it.
+_listing_cache: Optional[tuple[float, list[str]]] = None
+
+
+def _invalidate_listing_cache() -> None:
+    global _listing_cache
+    _listing_cache = None
+
+
+def _get_client() -> HTTPFileClient:
+    """Return the process-wide HTTPFileClient so connection pooling persists."""
+
+    global _file_client
+    if _file_client is None:
+        _file_client = HTTPFileClient.from_env()
+    return _file_client
+
+
+async def _try_read(client: HTTPFileClient, path: str, encoding: Optional[str]) -> Optional[dict]:
+    """Read a file from the store, returning None when it does not exist."""
+
+    try:
+        return await client.read(path, encoding)
+    except Exception:
+        return None
 
 
 def _model_from_name(name: str):
     return name
 
 
-INSTRUCTIONS = """You are a precise file editing assistant working within a single project workspace.
+# Interned so repeated prompt comparisons inside the agent runtime
+# short-circuit on identity instead of comparing the full text.
+INSTRUCTIONS = sys.intern("""You are a precise file editing assistant working within a single project workspace.
 
 File Operations:
 1. Reading files: Use read_file(path="...") to inspect file contents
@@ -245,9 +500,10 @@ Best Practices:
 - Preserve concurrent user edits by only changing specific parts
 - Provide clear descriptions for all edits
 - If you need to make multiple changes, use multiple search/replace blocks
-"""
+""")
 
 
+@functools.lru_cache(maxsize=4)
 def _build_agent(model_name: str) -> Agent:
     try:
         return Agent(
@@ -271,17 +527,17 @@ async def read_file(ctx: RunContext[None], path: str, encoding: Optional[str] =
         path: Path to the file (required).
         encoding: Text encoding (default: utf-8)
     """
-    state = _current_state()
-    client = HTTPFileClient.from_env()
+    state = _run_state.get()
+    client = _get_client()
     
-    print(f"[read_file] reading file {path}")
+    logger.debug("[read_file] reading file %s", path)
     try:
         data = await client.read(path, encoding)
     except Exception as e:
         raise ValueError(f"File '{path}' does not exist or cannot be read: {e}") from None
     
     if state:
-        state.record(WORKSPACE_ROOT / data["path"], data["content"], "read")
+        state.record(os.path.join(_WORKSPACE_STR, data["path"]), data["content"], "read")
     return data["content"]
 
 
@@ -332,58 +588,50 @@ async def edit_file(
         Success message describing what was done
     """
 
-    print(f"[edit_file] editing file {filepath}")
-    print(f"edit_instructions: {edit_instructions}")
-    print(f"content: {content}")
-    state = _current_state()
-    client = HTTPFileClient.from_env()
-    version_manager = get_edit_version_manager()
+    logger.debug("[edit_file] editing file %s", filepath)
+    logger.debug("edit_instructions: %s", edit_instructions)
+    logger.debug("content: %s", content)
+    state = _run_state.get()
+    client = _get_client()
+    version_manager = await get_edit_version_manager()
+
+    # One read serves the pre-agent backup, the existence check, and the edit
+    # branch's current content.
+    read_result = await _try_read(client, filepath, encoding)
+    file_exists = read_result is not None
 
     # CRITICAL: Save current file state before making any agent changes
     # This preserves the user's work even if agent edits fail
-    try:
-        print(f"[edit_file] Saving current file state before agent changes...")
-        
-        # Read current file content
-        current_file_data = await client.read(filepath, encoding)
-        current_file_content = current_file_data["content"]
-        
-        # Create a backup version record
-        backup_version = await version_manager.create_edit_version(
-            file_path=filepath,
-            content=current_file_content,
-            source=EditSource.USER,
-            owner="pre_agent_backup",
-            edit_operation_ids=[]
-        )
-        
-        print(f"[edit_file] Created backup version {backup_version.version_id} before agent changes")
-        
-        # AUTOMATICALLY SAVE the file before agent changes
-        print(f"[edit_file] Automatically saving file before agent changes...")
-        await client.write(filepath, current_file_content, encoding)
-        print(f"[edit_file] File automatically saved before agent changes")
-        
-    except Exception as e:
-        print(f"[edit_file] Warning: Failed to create backup or save file before agent changes: {e}")
-        # Continue with agent edit even if backup/save fails
+    backup_version = None
+    if read_result is not None:
+        logger.debug("[edit_file] Saving current file state before agent changes...")
+        current_file_content = read_result["content"]
+
+        # The version record preserves the pre-agent content on its own; no
+        # need to also write the unchanged content back to the store.
+        try:
+            backup_version = await version_manager.create_edit_version(
+                file_path=filepath,
+                content=current_file_content,
+                source=EditSource.USER,
+                owner="pre_agent_backup",
+                edit_operation_ids=[]
+            )
+            logger.debug("[edit_file] Created backup version %s before agent changes", backup_version.version_id)
+        except Exception as e:
+            logger.warning("[edit_file] Failed to create backup before agent changes: %s", e)
+            # Continue with agent edit even if the backup fails
 
     # Handle the case where both parameters might be provided due to concurrent edits
     if content is not None and edit_instructions is not None:
-        print(f"[edit_file] Warning: Both content and edit_instructions provided. Using edit_instructions for existing file.")
+        logger.warning("[edit_file] Both content and edit_instructions provided. Using edit_instructions for existing file.")
         content = None  # Prefer edit_instructions for existing files
     if content is None and edit_instructions is None:
         raise ValueError(
             "Must specify either 'content' (for new files) or 'edit_instructions' (for edits)."
         )
     
-    # Check if file exists to prevent accidental full file replacement
-    try:
-        await client.read(filepath, encoding)
-        file_exists = True
-    except Exception:
-        file_exists = False
-    
+    # Prevent accidental full file replacement of an existing file
     if file_exists and content is not None:
         raise ValueError(
             f"File '{filepath}' already exists. Use 'edit_instructions' with search/replace blocks "
@@ -409,134 +657,130 @@ async def edit_file(
         )
         edit_operation_ids.append(operation.id)
     else:
-        # Check for user edits BEFORE reading from file system
-        print(f"[edit_file] Checking for user edits before applying agent changes to {filepath}")
-        
-        # Get the latest user version (if any)
-        user_version = await version_manager.get_latest_version(filepath, EditSource.USER)
-    
-        # Check for unsaved user edits (from frontend)
-        unsaved_user_operations = [
-            op for op in version_manager._edit_operations.values()
-            if op.file_path == filepath and op.metadata.get("unsaved", False)
-        ]
-        
-        # Determine the user's current content (from unsaved edits or saved version)
+        # Check for user edits BEFORE reading from file system; the cheap flag
+        # lets the common no-concurrent-edits case skip the version lookups.
+        logger.debug("[edit_file] Checking for user edits before applying agent changes to %s", filepath)
+
+        user_version = None
+        unsaved_user_operations: list = []
         user_content = None
-        if unsaved_user_operations:
-            # Use the most recent unsaved edit from frontend
-            latest_unsaved = max(unsaved_user_operations, key=lambda op: op.timestamp)
-            user_content = latest_unsaved.content
-            print(f"[edit_file] Found unsaved user edits from frontend: {latest_unsaved.id}")
-            print(f"[edit_file] User frontend content: {repr(user_content[:100])}...")
-        elif user_version:
-            user_content = user_version.content
-            print(f"[edit_file] Found saved user version: {user_version.version_id}")
-            print(f"[edit_file] User content: {repr(user_content[:100])}...")
+        if version_manager.has_concurrent_edits(filepath):
+            # Get the latest user version (if any)
+            user_version = await version_manager.get_latest_version(filepath, EditSource.USER)
+
+            # Check for unsaved user edits (from frontend)
+            unsaved_user_operations = version_manager.get_unsaved_for_path(filepath)
+
+            # Determine the user's current content (from unsaved edits or saved version)
+            if unsaved_user_operations:
+                # Use the most recent unsaved edit from frontend
+                latest_unsaved = max(unsaved_user_operations, key=lambda op: op.timestamp_ns)
+                user_content = latest_unsaved.content
+                logger.debug("[edit_file] Found unsaved user edits from frontend: %s", latest_unsaved.id)
+                logger.debug("[edit_file] User frontend content: %r...", _Snippet(user_content))
+            elif user_version:
+                user_content = user_version.content
+                logger.debug("[edit_file] Found saved user version: %s", user_version.version_id)
+                logger.debug("[edit_file] User content: %r...", _Snippet(user_content))
         
-        # Read file system content only if no user content is available
-        try:
-            data = await client.read(filepath, encoding)
-            current_content = data["content"]
-            print(f"[edit_file] File system content: {repr(current_content[:100])}...")
-        except Exception as e:
+        if read_result is None:
             raise ValueError(
                 f"Cannot edit '{filepath}': file does not exist or cannot be read. "
-                f"To create a new file, use 'content' instead of 'edit_instructions'. Error: {e}"
-            ) from None
+                f"To create a new file, use 'content' instead of 'edit_instructions'."
+            )
+        current_content = read_result["content"]
+        logger.debug("[edit_file] File system content: %r...", _Snippet(current_content))
 
         # Decide which content to use as the base for agent edits
         # PRIORITY: Frontend unsaved edits > Saved user version > File system content
         base_content = current_content
         if user_content:
             if unsaved_user_operations:
-                print(f"[edit_file] Using frontend unsaved edits as base for agent edits")
+                logger.debug("[edit_file] Using frontend unsaved edits as base for agent edits")
                 base_content = user_content
             elif user_content != current_content:
-                print(f"[edit_file] User has saved changes that differ from file content")
-                print(f"[edit_file] Using user content as base for agent edits")
+                logger.debug("[edit_file] User has saved changes that differ from file content")
+                logger.debug("[edit_file] Using user content as base for agent edits")
                 base_content = user_content
             else:
-                print(f"[edit_file] User content matches file content, using file content as base")
+                logger.debug("[edit_file] User content matches file content, using file content as base")
                 base_content = current_content
         else:
-            print(f"[edit_file] No user content found, using current file content as base for agent edits")
-        
-        print(f"[edit_file] Final base content length: {len(base_content)} characters")
-        
+            logger.debug("[edit_file] No user content found, using current file content as base for agent edits")
+
+        logger.debug("[edit_file] Final base content length: %d characters", len(base_content))
+
         try:
-            print(f"[edit_file] Applying {len(edit_instructions)} edit instructions to {filepath}")
-            for i, instruction in enumerate(edit_instructions):
-                print(f"[edit_file] Edit instruction {i+1}: {repr(instruction[:100])}...")
-            
-            # Apply agent edits to the appropriate base content
-            final_content = _apply_edit_instructions(base_content, edit_instructions)  # type: ignore
-            print(f"[edit_file] Successfully applied edits to {filepath}")
+            logger.debug("[edit_file] Applying %d edit instructions to %s", len(edit_instructions), filepath)
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, instruction in enumerate(edit_instructions):
+                    logger.debug("[edit_file] Edit instruction %d: %r...", i + 1, _Snippet(instruction))
+
+            # Parse once; the same tuples feed both the apply and the version records
+            parsed_instructions = _parse_all(edit_instructions)
+            final_content = _apply_parsed(base_content, parsed_instructions)
+            logger.debug("[edit_file] Successfully applied edits to %s", filepath)
         except ValueError as e:
-            print(f"[edit_file] Error applying edits to {filepath}: {e}")
+            logger.debug("[edit_file] Error applying edits to %s: %s", filepath, e)
             raise ValueError(f"Failed to apply edits to '{filepath}': {e}") from None
 
         action = "edit"
-        
-        # Record each edit instruction as a separate operation
-        for i, instruction in enumerate(edit_instructions):
-            try:
-                print(f"[edit_file] Parsing edit instruction {i+1} for versioning")
-                search, replace = _parse_search_replace_block(instruction)
-                print(f"[edit_file] Parsed search/replace: {repr(search[:50])}... -> {repr(replace[:50])}...")
-                
-                operation = await version_manager.record_edit_operation(
-                    file_path=filepath,
-                    source=EditSource.AGENT,
-                    edit_type=EditType.SEARCH_REPLACE,
-                    owner="agent",
-                    description=f"{description} (edit {i+1}/{len(edit_instructions)})",
-                    search_text=search,
-                    replace_text=replace
-                )
-                edit_operation_ids.append(operation.id)
-                print(f"[edit_file] Recorded edit operation {operation.id}")
-            except Exception as e:
-                print(f"[edit_file] Failed to record edit operation {i}: {e}")
-                logger.warning(f"Failed to record edit operation {i}: {e}")
+
+        # Record every edit instruction in one batch: one persistence write
+        # instead of one per block.
+        op_payloads = [
+            dict(
+                file_path=filepath,
+                source=EditSource.AGENT,
+                edit_type=EditType.SEARCH_REPLACE,
+                owner="agent",
+                description=f"{description} (edit {i+1}/{len(edit_instructions)})",
+                search_text=search,
+                replace_text=replace,
+            )
+            for i, (search, replace) in enumerate(parsed_instructions)
+        ]
+        try:
+            operations = await version_manager.record_edit_operations(op_payloads)
+            edit_operation_ids.extend(op.id for op in operations)
+            logger.debug("[edit_file] Recorded %d edit operations", len(operations))
+        except Exception as e:
+            logger.warning("Failed to record edit operations: %s", e)
 
         # Clear unsaved edits since we're incorporating them
         if unsaved_user_operations:
             try:
-                print(f"[edit_file] Clearing {len(unsaved_user_operations)} unsaved user operations")
-                for op in unsaved_user_operations:
-                    if op.id in version_manager._edit_operations:
-                        del version_manager._edit_operations[op.id]
-                await version_manager._save_edit_operations()
-                print(f"[edit_file] Cleared unsaved user operations")
+                logger.debug("[edit_file] Clearing %d unsaved user operations", len(unsaved_user_operations))
+                await version_manager.drop_operations(op.id for op in unsaved_user_operations)
+                logger.debug("[edit_file] Cleared unsaved user operations")
             except Exception as e:
-                print(f"[edit_file] Failed to clear unsaved operations: {e}")
-    
-    print(f"[edit_file] Agent edit ready for {filepath}, proceeding with write")
+                logger.warning("[edit_file] Failed to clear unsaved operations: %s", e)
+
+    logger.debug("[edit_file] Agent edit ready for %s, proceeding with write", filepath)
 
     try:
         data = await client.write(filepath, final_content, encoding)
-        print(f"[edit_file] Successfully wrote agent changes to {filepath}")
+        logger.debug("[edit_file] Successfully wrote agent changes to %s", filepath)
     except Exception as e:
-        print(f"[edit_file] Failed to write agent changes to {filepath}: {e}")
-        
+        logger.warning("[edit_file] Failed to write agent changes to %s: %s", filepath, e)
+
         # Attempt to restore from backup if write failed
         try:
-            print(f"[edit_file] Attempting to restore from backup version...")
-            if 'backup_version' in locals():
+            logger.debug("[edit_file] Attempting to restore from backup version...")
+            if backup_version is not None:
                 await client.write(filepath, backup_version.content, encoding)
-                print(f"[edit_file] Successfully restored from backup version {backup_version.version_id}")
+                logger.debug("[edit_file] Successfully restored from backup version %s", backup_version.version_id)
             else:
-                print(f"[edit_file] No backup version available for restore")
+                logger.debug("[edit_file] No backup version available for restore")
         except Exception as restore_error:
-            print(f"[edit_file] Failed to restore from backup: {restore_error}")
+            logger.warning("[edit_file] Failed to restore from backup: %s", restore_error)
         
         raise ValueError(f"Unable to write '{filepath}': {e}") from None
 
     # Create version record with the actual modified content
     try:
-        print(f"[edit_file] Creating version record for {filepath} with {len(edit_operation_ids)} operations")
-        print(f"[edit_file] Version content: {repr(final_content[:100])}...")
+        logger.debug("[edit_file] Creating version record for %s with %d operations", filepath, len(edit_operation_ids))
+        logger.debug("[edit_file] Version content: %r...", _Snippet(final_content))
         version = await version_manager.create_edit_version(
             file_path=filepath,
             content=final_content,
@@ -544,13 +788,16 @@ async def edit_file(
             owner="agent",
             edit_operation_ids=edit_operation_ids
         )
-        print(f"[edit_file] Created version {version.version_id} for {filepath}")
+        logger.debug("[edit_file] Created version %s for %s", version.version_id, filepath)
     except Exception as e:
-        print(f"[edit_file] Failed to create version record for {filepath}: {e}")
-        logger.warning(f"Failed to create version record for {filepath}: {e}")
+        logger.warning("Failed to create version record for %s: %s", filepath, e)
+
+    written_path = os.path.join(_WORKSPACE_STR, data["path"])
+    _invalidate_read_cache(written_path)
+    _invalidate_listing_cache()
 
     if state:
-        state.record(WORKSPACE_ROOT / data["path"], data["content"], action)
+        state.record(written_path, data["content"], action)
 
     if action == "create":
         return f"Created {filepath}: {description}"
@@ -561,8 +808,13 @@ async def edit_file(
 @agent.tool
 async def list_files(ctx: RunContext[None]) -> list[str]:
     """List all files under the store root (files/...)."""
-    client = HTTPFileClient.from_env()
+    global _listing_cache
+    now = time.monotonic()
+    if _listing_cache is not None and now - _listing_cache[0] < LIST_FILES_TTL:
+        return _listing_cache[1]
+    client = _get_client()
     data = await client.list_files()
+    _listing_cache = (now, data)
     return data
 
 
@@ -574,4 +826,6 @@ __all__ = [
     "push_run_state",
     "pop_run_state",
     "safe_read_text",
+    "safe_read_text_async",
+    "clear_read_file_cache",
 ]
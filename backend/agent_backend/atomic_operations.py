@@ -2,20 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
+import itertools
 import logging
-import tempfile
-import time
+import os
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Tuple, Any, Dict
 
+try:  # optional fast non-cryptographic hashing for ETags
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
 from .file_locks import get_lock_manager, FileLockedError, FileConflictError
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AtomicOperationResult:
     """Result of an atomic file operation."""
     success: bool
@@ -30,63 +35,108 @@ class AtomicOperationResult:
 class AtomicFileOperations:
     """Provides atomic file operations with conflict resolution."""
     
-    def __init__(self, workspace_root: Path, encoding: str = "utf-8"):
+    def __init__(self, workspace_root: Path, encoding: str = "utf-8", cryptographic_etag: bool = False):
         self.workspace_root = workspace_root
         self.encoding = encoding
         self.lock_manager = get_lock_manager()
-    
+        # ETags are used for optimistic-concurrency comparison only, so a
+        # fast non-cryptographic hash is the default when xxhash is present.
+        self.cryptographic_etag = cryptographic_etag
+        self._use_xxhash = xxhash is not None and not cryptographic_etag
+
+        # Resolved once; per-operation escape checks are then pure string
+        # comparisons with no realpath syscall walk.
+        self._workspace_root_resolved = workspace_root.resolve()
+        self._workspace_prefix = str(self._workspace_root_resolved) + os.sep
+
+        # Monotonic per-process counter for backup names: no time syscall and
+        # no same-second rename collisions; the pid keeps processes apart.
+        self._backup_counter = itertools.count()
+
+    def _resolve_in_workspace(self, file_path: str) -> Path:
+        """Join a user path against the cached root, rejecting escapes.
+
+        resolve() only runs when the path actually contains a '..' segment;
+        every other call is a join plus one string prefix check.
+        """
+        candidate = self._workspace_root_resolved / file_path
+        if ".." in file_path:
+            candidate = candidate.resolve()
+        joined = str(candidate)
+        if joined != self._workspace_prefix[:-1] and not joined.startswith(self._workspace_prefix):
+            raise ValueError(f"Path {file_path} is outside workspace")
+        return candidate
+
+    def _new_digest(self):
+        """Fresh digest object for the configured ETag algorithm."""
+        return xxhash.xxh3_128() if self._use_xxhash else hashlib.sha256()
+
     def _etag_for_content(self, content: str) -> str:
         """Generate ETag for content."""
-        return hashlib.sha256(content.encode(self.encoding)).hexdigest()
-    
-    def _read_file_atomic(self, file_path: Path) -> Tuple[str, str]:
-        """Atomically read a file and return content + ETag."""
+        digest = self._new_digest()
+        digest.update(content.encode(self.encoding))
+        return digest.hexdigest()
+
+    def _etag_for_file(self, file_path: Path) -> str:
+        """Hash a file in C against a reusable buffer, never holding its bytes."""
+        with open(file_path, 'rb') as f:
+            return hashlib.file_digest(f, self._new_digest).hexdigest()
+
+    def _read_file_atomic(self, file_path: Path) -> Tuple[str, str, int]:
+        """Atomically read a file and return content, ETag and byte size."""
         try:
-            raw_content = file_path.read_bytes()
-            content = raw_content.decode(self.encoding)
-            etag = hashlib.sha256(raw_content).hexdigest()
-            return content, etag
+            # file_digest streams the hash loop in C; only the decoded content
+            # is materialized in Python.
+            with open(file_path, 'rb') as f:
+                etag = hashlib.file_digest(f, self._new_digest).hexdigest()
+                f.seek(0)
+                raw = f.read()
+            return raw.decode(self.encoding), etag, len(raw)
         except FileNotFoundError:
             raise FileNotFoundError(f"File {file_path} not found")
         except UnicodeDecodeError as e:
             raise ValueError(f"Invalid encoding for file {file_path}: {e}")
     
-    def _write_file_atomic(self, file_path: Path, content: str, backup: bool = True) -> str:
-        """Atomically write a file using temporary file + rename."""
+    def _write_file_atomic(self, file_path: Path, content: str | bytes, backup: bool = False) -> Tuple[str, int]:
+        """Atomically write a file using an fsync'd temp file + os.replace."""
+        # Encode exactly once; the same buffer is written and hashed.
+        data = content.encode(self.encoding) if isinstance(content, str) else content
+        temp_path = file_path.with_name(f".tmp_{file_path.name}")
         try:
-            # Ensure parent directory exists
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Create backup if requested
             if backup and file_path.exists():
-                backup_path = file_path.with_suffix(f"{file_path.suffix}.backup.{int(time.time())}")
-                file_path.rename(backup_path)
+                # One rolling backup per file; timestamped copies accumulated
+                # without bound and slowed every directory scan over time.
+                backup_path = file_path.with_suffix(f"{file_path.suffix}.backup")
+                os.replace(file_path, backup_path)
                 logger.debug(f"Created backup: {backup_path}")
-            
-            # Write to temporary file first
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                encoding=self.encoding,
-                dir=file_path.parent,
-                delete=False,
-                prefix=f".tmp_{file_path.name}."
-            ) as temp_file:
-                temp_file.write(content)
-                temp_path = Path(temp_file.name)
-            
-            # Atomic rename (this is atomic on most filesystems)
-            temp_path.rename(file_path)
-            
-            # Generate ETag for the written content
-            etag = self._etag_for_content(content)
+
+            try:
+                fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            except FileNotFoundError:
+                # Create the parent lazily rather than mkdir'ing on every write
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            # os.replace is atomic and overwrites any existing target
+            os.replace(temp_path, file_path)
+
+            # Generate ETag from the already-encoded buffer
+            digest = self._new_digest()
+            digest.update(data)
+            etag = digest.hexdigest()
             logger.debug(f"Atomically wrote {file_path} (ETag: {etag[:8]}...)")
-            return etag
-            
-        except Exception as e:
+            return etag, len(data)
+
+        except Exception:
             # Clean up temp file if it exists
-            if 'temp_path' in locals() and temp_path.exists():
+            if temp_path.exists():
                 temp_path.unlink()
-            raise e
+            raise
     
     @asynccontextmanager
     async def atomic_read_modify_write(
@@ -98,29 +148,25 @@ class AtomicFileOperations:
         timeout: Optional[float] = None
     ):
         """Context manager for atomic read-modify-write operations."""
-        resolved_path = (self.workspace_root / file_path).resolve()
-        
-        # Ensure path is within workspace
-        if not str(resolved_path).startswith(str(self.workspace_root)):
-            raise ValueError(f"Path {file_path} is outside workspace")
-        
-        # Acquire lock
-        async with self.lock_manager.acquire_lock(
+        resolved_path = self._resolve_in_workspace(file_path)
+
+        # Acquire lock and the tracked version in one manager call
+        async with self.lock_manager.acquire_lock_with_version(
             file_path=file_path,
             owner=owner,
             operation_type=operation_type,
             context=context,
             timeout=timeout
-        ):
+        ) as (_lock, current_version):
             try:
-                # Read current content
-                if resolved_path.exists():
-                    content, etag = self._read_file_atomic(resolved_path)
-                else:
+                # Read current content off the event loop; a missing file is
+                # the empty state, so no separate existence stat is needed.
+                try:
+                    content, etag, _size = await asyncio.to_thread(self._read_file_atomic, resolved_path)
+                except FileNotFoundError:
                     content, etag = "", ""
-                
+
                 # Check for conflicts if we have a previous version
-                current_version = self.lock_manager.get_file_version(file_path)
                 if current_version and current_version.etag != etag:
                     raise FileConflictError(
                         f"File {file_path} was modified by {current_version.owner} "
@@ -143,17 +189,16 @@ class AtomicFileOperations:
         context: Optional[str] = None
     ) -> AtomicOperationResult:
         """Atomically write content to a file with conflict detection."""
-        resolved_path = (self.workspace_root / file_path).resolve()
-        
-        # Ensure path is within workspace
-        if not str(resolved_path).startswith(str(self.workspace_root)):
+        try:
+            resolved_path = self._resolve_in_workspace(file_path)
+        except ValueError as e:
             return AtomicOperationResult(
                 success=False,
                 file_path=file_path,
                 content=content,
                 etag="",
                 version=0,
-                error=f"Path {file_path} is outside workspace"
+                error=str(e)
             )
         
         try:
@@ -163,29 +208,48 @@ class AtomicFileOperations:
                 operation_type="write",
                 context=context
             ):
-                # Check for conflicts if expected ETag provided
-                if expected_etag and resolved_path.exists():
-                    current_content, current_etag = self._read_file_atomic(resolved_path)
-                    if current_etag != expected_etag:
+                # Check for conflicts if expected ETag provided; hashing the
+                # bytes directly skips reading and decoding the content just
+                # to throw it away.
+                if expected_etag:
+                    current_etag: Optional[str] = None
+                    size_conflict = False
+                    tracked = self.lock_manager.get_file_version(file_path)
+                    try:
+                        if tracked is not None and tracked.etag == expected_etag:
+                            # Most conflicting writes change the file's size,
+                            # so a single stat against the tracked version
+                            # settles those without hashing a byte.
+                            st_size = (await asyncio.to_thread(os.stat, resolved_path)).st_size
+                            size_conflict = st_size != tracked.size
+                        if not size_conflict:
+                            current_etag = await asyncio.to_thread(self._etag_for_file, resolved_path)
+                    except FileNotFoundError:
+                        current_etag = None
+                    if size_conflict or (current_etag is not None and current_etag != expected_etag):
                         return AtomicOperationResult(
                             success=False,
                             file_path=file_path,
                             content=content,
-                            etag=current_etag,
+                            etag=current_etag or "",
                             version=0,
-                            error=f"Conflict detected: expected ETag {expected_etag}, got {current_etag}",
+                            error=(
+                                f"Conflict detected: file size changed since ETag {expected_etag}"
+                                if size_conflict
+                                else f"Conflict detected: expected ETag {expected_etag}, got {current_etag}"
+                            ),
                             conflict_resolved=False
                         )
-                
-                # Write content atomically
-                etag = self._write_file_atomic(resolved_path, content)
-                
+
+                # Write content atomically, off the event loop
+                etag, size = await asyncio.to_thread(self._write_file_atomic, resolved_path, content)
+
                 # Update version tracking
                 version = self.lock_manager.update_file_version(
                     file_path=file_path,
-                    content=content,
                     etag=etag,
-                    owner=owner
+                    owner=owner,
+                    size=size
                 )
                 
                 logger.info(f"Successfully wrote {file_path} (v{version.version}) by {owner}")
@@ -234,29 +298,25 @@ class AtomicFileOperations:
         context: Optional[str] = None
     ) -> Tuple[str, str, int]:
         """Atomically read a file and return content, ETag, and version."""
-        resolved_path = (self.workspace_root / file_path).resolve()
-        
-        # Ensure path is within workspace
-        if not str(resolved_path).startswith(str(self.workspace_root)):
-            raise ValueError(f"Path {file_path} is outside workspace")
-        
+        resolved_path = self._resolve_in_workspace(file_path)
+
         async with self.lock_manager.acquire_lock(
             file_path=file_path,
             owner=owner,
             operation_type="read",
             context=context
         ):
-            if not resolved_path.exists():
-                raise FileNotFoundError(f"File {file_path} not found")
-            
-            content, etag = self._read_file_atomic(resolved_path)
-            
+            try:
+                content, etag, size = await asyncio.to_thread(self._read_file_atomic, resolved_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File {file_path} not found") from None
+
             # Update version tracking
             version = self.lock_manager.update_file_version(
                 file_path=file_path,
-                content=content,
                 etag=etag,
-                owner=owner
+                owner=owner,
+                size=size
             )
             
             return content, etag, version.version
@@ -268,17 +328,16 @@ class AtomicFileOperations:
         context: Optional[str] = None
     ) -> AtomicOperationResult:
         """Atomically delete a file."""
-        resolved_path = (self.workspace_root / file_path).resolve()
-        
-        # Ensure path is within workspace
-        if not str(resolved_path).startswith(str(self.workspace_root)):
+        try:
+            resolved_path = self._resolve_in_workspace(file_path)
+        except ValueError as e:
             return AtomicOperationResult(
                 success=False,
                 file_path=file_path,
                 content="",
                 etag="",
                 version=0,
-                error=f"Path {file_path} is outside workspace"
+                error=str(e)
             )
         
         try:
@@ -288,7 +347,14 @@ class AtomicFileOperations:
                 operation_type="delete",
                 context=context
             ):
-                if not resolved_path.exists():
+                # Create backup before deletion; the rename doubles as the
+                # existence check.
+                backup_path = resolved_path.with_suffix(
+                    f"{resolved_path.suffix}.deleted.{os.getpid()}.{next(self._backup_counter)}"
+                )
+                try:
+                    await asyncio.to_thread(os.replace, resolved_path, backup_path)
+                except FileNotFoundError:
                     return AtomicOperationResult(
                         success=False,
                         file_path=file_path,
@@ -298,14 +364,9 @@ class AtomicFileOperations:
                         error=f"File {file_path} does not exist"
                     )
                 
-                # Create backup before deletion
-                backup_path = resolved_path.with_suffix(f"{resolved_path.suffix}.deleted.{int(time.time())}")
-                resolved_path.rename(backup_path)
-                
                 # Update version tracking
                 version = self.lock_manager.update_file_version(
                     file_path=file_path,
-                    content="",
                     etag="",
                     owner=owner
                 )
@@ -344,8 +405,12 @@ class AtomicFileOperations:
         lock_info = self.lock_manager.get_lock_info(file_path)
         version_info = self.lock_manager.get_file_version(file_path)
         
-        resolved_path = (self.workspace_root / file_path).resolve()
-        exists = resolved_path.exists()
+        resolved_path = self._resolve_in_workspace(file_path)
+        try:
+            os.stat(resolved_path)
+            exists = True
+        except (FileNotFoundError, OSError):
+            exists = False
         
         status = {
             "file_path": file_path,
@@ -5,7 +5,7 @@ import os
 import random
 import string
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Iterable
 
 from .file_client import HTTPFileClient
@@ -23,30 +23,64 @@ class ChaosConfig:
     base_url: str
     interval_seconds: int = 30
     protect: tuple[str, ...] = ("files/example.py",)
+    # Built once; _step runs forever and shouldn't rebuild this per call.
+    protect_set: frozenset[str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.protect_set = frozenset(self.protect)
 
 _original_files: dict[str, list[str]] = {}
-_all_lines: list[str] = []
+# Assembled once at load time so create ops don't re-join the line lists,
+# plus a stable tuple of paths for allocation-free random.choice picks.
+_original_contents: dict[str, str] = {}
+_original_paths: tuple[str, ...] = ()
+# Filename stems parallel to _original_paths, so create ops don't re-split
+# the path on every call.
+_original_stems: tuple[str, ...] = ()
+_all_lines: tuple[str, ...] = ()
+
+# Instance-local RNG: avoids the global random module's shared-state lock
+# and lets hot functions bind its methods directly.
+_rng = random.Random()
 
 
 async def _load_original_files(client: HTTPFileClient) -> None:
     """Load all original files into memory for reference."""
-    global _original_files, _all_lines
+    global _original_files, _all_lines, _original_paths, _original_stems
+    global _pick_filename, _pick_content, _swap_line
 
     if _original_files:  # Already loaded
         return
 
     try:
+        all_lines: list[str] = []
         files = await client.list_files()
-        for file_path in files:
-            try:
-                data = await client.read(file_path)
-                lines = data["content"].splitlines()
-                if lines:
-                    _original_files[file_path] = lines
-                    _all_lines.extend(lines)
-            except Exception:
-                pass  # Skip files that can't be read
-
+        # Issue all reads at once; the client coalesces them into a
+        # single batch round trip instead of one RTT per file.
+        reads = await asyncio.gather(
+            *(client.read(file_path) for file_path in files),
+            return_exceptions=True,
+        )
+        for file_path, data in zip(files, reads):
+            if isinstance(data, BaseException):
+                continue  # Skip files that can't be read
+            lines = data["content"].splitlines()
+            if lines:
+                _original_files[file_path] = lines
+                _original_contents[file_path] = "\n".join(lines) + "\n"
+                all_lines.extend(lines)
+
+        _original_paths = tuple(_original_files)
+        stems = []
+        for path in _original_paths:
+            name = path.rsplit('/', 1)[-1]
+            stems.append(name.rsplit('.', 1)[0] if '.' in name else name)
+        _original_stems = tuple(stems)
+        _all_lines = tuple(all_lines)
+        if _original_files:
+            _pick_filename = _random_filename_from_original
+            _pick_content = _random_content_from_original
+            _swap_line = _swap_random_line
         print(f"[chaos] Loaded {len(_original_files)} original files with {len(_all_lines)} total lines")
     except Exception as e:
         print(f"[chaos] Failed to load original files: {e}")
@@ -54,79 +88,107 @@ async def _load_original_files(client: HTTPFileClient) -> None:
 
 def _random_filename_from_original() -> str:
     """Generate a filename based on a random original file."""
-    if not _original_files:
-        rand = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
-        return f"files/chaos_{rand}.py"
-
-    original_path = random.choice(list(_original_files.keys()))
-    original_name = original_path.split('/')[-1]
-    name_without_ext = original_name.rsplit('.', 1)[0] if '.' in original_name else original_name
-    rand = "".join(random.choices(string.ascii_lowercase + string.digits, k=6))
-
-    return f"files/{name_without_ext}_{rand}.py"
+    rand = "".join(_rng.choices(string.ascii_lowercase + string.digits, k=6))
+    stem = _original_stems[_rng.randrange(len(_original_stems))]
+    return f"files/{stem}_{rand}.py"
 
 
 def _random_content_from_original() -> str:
     """Generate content by copying a FULL random original file."""
-    if not _original_files:
-        return "# chaos file\n"
-
-    original_path = random.choice(list(_original_files.keys()))
-    original_lines = _original_files[original_path]
-
-    return "\n".join(original_lines) + "\n"
+    return _original_contents[_original_paths[_rng.randrange(len(_original_paths))]]
 
 
 def _swap_random_line(content: str) -> str:
     """Swap a random line in the content with a random line from original files."""
-    if not _all_lines:
+    all_lines = _all_lines
+    if not content:
         return content
 
-    lines = content.splitlines()
-    if not lines:
+    # Splice the chosen line in place: one newline count, a walk to the
+    # target line's start, and a single concat — no splitlines/join of the
+    # whole body. Trailing-newline handling falls out of the slicing.
+    n_lines = content.count("\n")
+    if not content.endswith("\n"):
+        n_lines += 1
+    if n_lines == 0:
         return content
 
-    idx = random.randrange(len(lines))
-    replacement = random.choice(_all_lines)
+    rand = _rng.randrange
+    start = 0
+    for _ in range(rand(n_lines)):
+        start = content.find("\n", start) + 1
+    end = content.find("\n", start)
+    if end == -1:
+        end = len(content)
+
+    return content[:start] + all_lines[rand(len(all_lines))] + content[end:]
+
+
+def _fallback_filename() -> str:
+    """Pre-load stand-in for _random_filename_from_original."""
+    rand = "".join(_rng.choices(string.ascii_lowercase + string.digits, k=6))
+    return f"files/chaos_{rand}.py"
+
 
-    lines[idx] = replacement
+def _fallback_content() -> str:
+    """Pre-load stand-in for _random_content_from_original."""
+    return "# chaos file\n"
 
-    return "\n".join(lines) + ("\n" if content.endswith("\n") else "")
 
+def _fallback_swap_line(content: str) -> str:
+    """Pre-load stand-in for _swap_random_line: nothing to swap in yet."""
+    return content
 
-def _eligible(files: Iterable[str], protect: set[str]) -> list[str]:
+
+# Dispatch pointers for the hot helpers: bound to the empty-state fallbacks
+# at import time and rebound to the real implementations once the originals
+# load, so the steady state never re-checks "is the cache populated?".
+_pick_filename = _fallback_filename
+_pick_content = _fallback_content
+_swap_line = _fallback_swap_line
+
+
+def _eligible(files: Iterable[str], protect: frozenset[str]) -> list[str]:
     return [f for f in files if f not in protect]
 
 
-async def _step(client: HTTPFileClient, cfg: ChaosConfig) -> str:
-    files = await client.list_files()
-    protect = set(cfg.protect)
-    choices = ["create", "update", "delete"]
+# How many steps between full listings from the server; between resyncs the
+# local cache tracks our own creates/deletes.
+RESYNC_EVERY = 20
 
-    if not files or not _eligible(files, protect):
+
+async def _step(client: HTTPFileClient, cfg: ChaosConfig, files: set[str]) -> str:
+    # Filter once; the op choice and the target pick share the same pool.
+    pool = _eligible(files, cfg.protect_set)
+
+    if not pool:
         op = "create"
     else:
-        op = random.choices(choices, weights=[2, 5, 3], k=1)[0]
+        op = _rng.choices(("create", "update", "delete"), weights=[2, 5, 3], k=1)[0]
 
     if op == "create":
-        path = _random_filename_from_original()
-        await client.write(path, _random_content_from_original())
+        path = _pick_filename()
+        await client.write(path, _pick_content())
+        files.add(path)
         return f"create → {path}"
 
-    pool = _eligible(files, protect)
-    if not pool:
-        path = _random_filename_from_original()
-        await client.write(path, _random_content_from_original())
-        return f"create → {path}"
-
-    target = random.choice(pool)
+    target = _rng.choice(pool)
 
     if op == "delete":
         await client.delete(target)
+        files.discard(target)
         return f"delete → {target}"
 
-    body = (await client.read(target))["content"]
-    body = _swap_random_line(body)
+    target_lines = _original_files.get(target)
+    if target_lines:
+        # Mutate a copy of the cached line list; no read round-trip and no
+        # re-splitting of the body.
+        lines = target_lines.copy()
+        lines[_rng.randrange(len(lines))] = _rng.choice(_all_lines)
+        body = "\n".join(lines) + "\n"
+    else:
+        body = (await client.read(target))["content"]
+        body = _swap_line(body)
     await client.write(target, body)
     return f"update (line swap) → {target}"
 
@@ -138,17 +200,36 @@ async def main() -> None:
         protect=tuple(filter(None, os.getenv("CHAOS_PROTECT", "files/example.py").split(","))),
     )
     client = HTTPFileClient.from_env()
-    print(f"[chaos] targeting {cfg.base_url}, interval={cfg.interval_seconds}s, protect={cfg.protect}")
+    concurrency = max(1, _env_int("CHAOS_CONCURRENCY", 1))
+    print(
+        f"[chaos] targeting {cfg.base_url}, interval={cfg.interval_seconds}s, "
+        f"protect={cfg.protect}, concurrency={concurrency}"
+    )
 
     await _load_original_files(client)
 
+    cached_files = set(await client.list_files())
+    step_count = 0
     try:
         while True:
             try:
-                msg = await _step(client, cfg)
-                print(f"[chaos] {msg}")
+                if step_count and step_count % RESYNC_EVERY == 0:
+                    cached_files = set(await client.list_files())
+                # Issue the batch concurrently; serial HTTP latency is the
+                # throughput ceiling, not CPU. The shared set is only mutated
+                # from this loop's thread, so no lock is needed.
+                results = await asyncio.gather(
+                    *(_step(client, cfg, cached_files) for _ in range(concurrency)),
+                    return_exceptions=True,
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        print(f"[chaos] error: {result!r}")
+                    else:
+                        print(f"[chaos] {result}")
             except Exception as e:  # keep running
                 print(f"[chaos] error: {e!r}")
+            step_count += 1
             await asyncio.sleep(cfg.interval_seconds)
     except KeyboardInterrupt:
         print("[chaos] stopped.")
@@ -8,17 +8,32 @@ from both users and agents, with intelligent conflict resolution.
 from __future__ import annotations
 
 import asyncio
+import bisect
 import hashlib
-import json
 import logging
+import os
+import re
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Union
 from uuid import uuid4
 
+import aiofiles
+import orjson
+
+try:  # optional fast non-cryptographic hashing for ETags
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+try:  # optional C parser for ISO-8601 timestamps on the load path
+    from ciso8601 import parse_datetime
+except ImportError:  # pragma: no cover - optional dependency
+    parse_datetime = datetime.fromisoformat
+
 from .atomic_operations import AtomicFileOperations, AtomicOperationResult
 
 logger = logging.getLogger(__name__)
@@ -47,7 +62,7 @@ class ConflictResolutionStrategy(Enum):
     MANUAL = "manual"
 
 
-@dataclass
+@dataclass(slots=True)
 class EditOperation:
     """Represents a single edit operation."""
     id: str
@@ -70,19 +85,39 @@ class EditOperation:
     length: Optional[int] = None
     
     # Metadata
-    metadata: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
-    
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    # Epoch nanoseconds captured at creation; recency comparisons use this
+    # single int instead of datetime's multi-field compare.
+    timestamp_ns: int = field(default_factory=time.time_ns)
+
+    # Serialized form, cached after the first to_dict; records are
+    # effectively immutable after creation, so saves reuse it.
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
-        data = asdict(self)
-        data['source'] = self.source.value
-        data['edit_type'] = self.edit_type.value
-        data['timestamp'] = self.timestamp.isoformat()
-        return data
+        if self._cached_dict is None:
+            # Explicit literal instead of asdict: the reflective deep walk
+            # dominated serialization time on long histories. metadata is
+            # shared by reference; operations are not mutated after creation.
+            self._cached_dict = {
+                'id': self.id,
+                'file_path': self.file_path,
+                'source': self.source.value,
+                'edit_type': self.edit_type.value,
+                'timestamp': self.timestamp,
+                'owner': self.owner,
+                'description': self.description,
+                'search_text': self.search_text,
+                'replace_text': self.replace_text,
+                'content': self.content,
+                'position': self.position,
+                'length': self.length,
+                'metadata': self.metadata,
+                'timestamp_ns': self.timestamp_ns,
+            }
+        return self._cached_dict
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EditOperation':
@@ -90,47 +125,78 @@ class EditOperation:
         data = data.copy()
         data['source'] = EditSource(data['source'])
         data['edit_type'] = EditType(data['edit_type'])
-        data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+        data['timestamp'] = parse_datetime(data['timestamp'])
+        if 'timestamp_ns' not in data:  # legacy records predate the field
+            data['timestamp_ns'] = int(data['timestamp'].timestamp() * 1e9)
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class EditVersion:
     """Represents a version of a file with associated edits."""
     version_id: str
     file_path: str
-    content: str
     etag: str
     timestamp: datetime
     source: EditSource
     owner: str
+    # Contents live in the manager's content-addressed blob store; this
+    # field is populated from there on load and is never serialized.
+    content: str = ""
     base_version_id: Optional[str] = None
-    edit_operations: List[str] = None  # List of edit operation IDs
-    conflicts: List[str] = None  # List of conflict IDs
-    
-    def __post_init__(self):
-        if self.edit_operations is None:
-            self.edit_operations = []
-        if self.conflicts is None:
-            self.conflicts = []
-    
+    edit_operations: List[str] = field(default_factory=list)  # List of edit operation IDs
+    conflicts: List[str] = field(default_factory=list)  # List of conflict IDs
+
+    # Epoch nanoseconds captured at creation; ordering and latest-pointer
+    # updates compare this int rather than the datetime.
+    timestamp_ns: int = field(default_factory=time.time_ns)
+
+    # Lazily computed line set for similarity checks; never serialized.
+    _lines_set: Optional[frozenset] = field(default=None, init=False, repr=False, compare=False)
+
+    # Serialized form, cached after the first to_dict; cleared at the few
+    # sites that mutate a version after creation.
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def lines_set(self) -> frozenset:
+        """Set of this version's lines, computed once per instance."""
+        if self._lines_set is None:
+            self._lines_set = frozenset(self.content.splitlines())
+        return self._lines_set
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
-        data = asdict(self)
-        data['source'] = self.source.value
-        data['timestamp'] = self.timestamp.isoformat()
-        return data
+        if self._cached_dict is None:
+            # The id lists are copied because detect_conflicts appends to
+            # them after creation; a dict already queued for the log writer
+            # must not change under it.
+            self._cached_dict = {
+                'version_id': self.version_id,
+                'file_path': self.file_path,
+                'etag': self.etag,
+                'timestamp': self.timestamp,
+                'source': self.source.value,
+                'owner': self.owner,
+                'base_version_id': self.base_version_id,
+                'edit_operations': list(self.edit_operations),
+                'conflicts': list(self.conflicts),
+                'timestamp_ns': self.timestamp_ns,
+            }
+        return self._cached_dict
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EditVersion':
         """Create from dictionary."""
         data = data.copy()
         data['source'] = EditSource(data['source'])
-        data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+        data['timestamp'] = parse_datetime(data['timestamp'])
+        if 'timestamp_ns' not in data:  # legacy records predate the field
+            data['timestamp_ns'] = int(data['timestamp'].timestamp() * 1e9)
         return cls(**data)
 
 
-@dataclass
+@dataclass(slots=True)
 class EditConflict:
     """Represents a conflict between user and agent edits."""
     conflict_id: str
@@ -142,20 +208,33 @@ class EditConflict:
     resolved: bool = False
     resolved_version_id: Optional[str] = None
     resolution_notes: Optional[str] = None
-    
+
+    # Serialized form, cached after the first to_dict; cleared when the
+    # conflict is resolved.
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
-        data = asdict(self)
-        data['resolution_strategy'] = self.resolution_strategy.value
-        data['timestamp'] = self.timestamp.isoformat()
-        return data
+        if self._cached_dict is None:
+            self._cached_dict = {
+                'conflict_id': self.conflict_id,
+                'file_path': self.file_path,
+                'user_version_id': self.user_version_id,
+                'agent_version_id': self.agent_version_id,
+                'timestamp': self.timestamp,
+                'resolution_strategy': self.resolution_strategy.value,
+                'resolved': self.resolved,
+                'resolved_version_id': self.resolved_version_id,
+                'resolution_notes': self.resolution_notes,
+            }
+        return self._cached_dict
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EditConflict':
         """Create from dictionary."""
         data = data.copy()
         data['resolution_strategy'] = ConflictResolutionStrategy(data['resolution_strategy'])
-        data['timestamp'] = datetime.fromisoformat(data['timestamp'])
+        data['timestamp'] = parse_datetime(data['timestamp'])
         return cls(**data)
 
 
@@ -166,6 +245,11 @@ class EditVersionManager:
         self.workspace_root = workspace_root
         self.versions_dir = versions_dir or (workspace_root / ".edit_versions")
         self.versions_dir.mkdir(exist_ok=True)
+
+        # Version contents are stored once per unique etag rather than
+        # JSON-escaped into every version record.
+        self._blobs_dir = self.versions_dir / "blobs"
+        self._blobs_dir.mkdir(exist_ok=True)
         
         self.atomic_ops = AtomicFileOperations(workspace_root)
         
@@ -173,83 +257,321 @@ class EditVersionManager:
         self._edit_operations: Dict[str, EditOperation] = {}
         self._edit_versions: Dict[str, EditVersion] = {}
         self._edit_conflicts: Dict[str, EditConflict] = {}
-        
-        # Load existing data
-        asyncio.create_task(self._load_existing_data())
-    
+
+        # Unsaved (frontend) operations indexed by file path so hot paths
+        # don't scan every recorded operation on each lookup.
+        self._unsaved_by_path: Dict[str, Dict[str, EditOperation]] = {}
+
+        # Secondary indexes so version and conflict lookups are per-file
+        # instead of scans over every record in the workspace.
+        self._versions_by_path: Dict[str, List[EditVersion]] = {}
+        self._latest_by_path_source: Dict[Tuple[str, EditSource], EditVersion] = {}
+        self._latest_any_by_path: Dict[str, EditVersion] = {}
+        self._conflicts_by_path: Dict[str, List[EditConflict]] = {}
+
+        # Paths that have genuine user versions (pre-agent backups excluded);
+        # lets edit paths skip version lookups when no user activity exists.
+        self._user_version_paths: set[str] = set()
+
+        # Lines currently in each append-only log, used to decide when a
+        # log has accumulated enough superseded records to be worth
+        # compacting back down to the live set.
+        self._log_lines: Dict[str, int] = {"operations": 0, "versions": 0, "conflicts": 0}
+
+        # One lock per log so concurrent requests can't interleave appends
+        # or race an append against a compaction rewrite.
+        self._log_locks: Dict[str, asyncio.Lock] = {
+            kind: asyncio.Lock() for kind in ("operations", "versions", "conflicts")
+        }
+
+        # Records queued for the background writer; mutators enqueue and
+        # return, and one task appends each burst in a single write per log.
+        self._pending: Dict[str, List[Dict[str, Any]]] = {
+            "operations": [], "versions": [], "conflicts": []
+        }
+        self._write_event = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+
+    @classmethod
+    async def create(cls, workspace_root: Path, versions_dir: Optional[Path] = None) -> "EditVersionManager":
+        """Construct a manager with existing data fully loaded.
+
+        Loading used to be a fire-and-forget task kicked off by __init__,
+        so callers racing construction could observe empty caches. The
+        factory awaits the load once before handing the instance out.
+        """
+        manager = cls(workspace_root, versions_dir)
+        await manager._load_existing_data()
+        return manager
+
     async def _load_existing_data(self):
         """Load existing edit data from storage."""
         try:
-            await self._load_edit_operations()
-            await self._load_edit_versions()
-            await self._load_edit_conflicts()
+            # The three logs are independent files; read them in parallel.
+            await asyncio.gather(
+                self._load_edit_operations(),
+                self._load_edit_versions(),
+                self._load_edit_conflicts(),
+            )
             logger.info("Loaded existing edit version data")
         except Exception as e:
             logger.warning(f"Failed to load existing edit data: {e}")
     
-    async def _load_edit_operations(self):
-        """Load edit operations from storage."""
-        operations_file = self.versions_dir / "edit_operations.json"
-        if operations_file.exists():
+    def _log_path(self, kind: str) -> Path:
+        return self.versions_dir / f"edit_{kind}.jsonl"
+
+    def _blob_path(self, etag: str) -> Path:
+        return self._blobs_dir / etag[:2] / etag
+
+    async def _store_blob(self, etag: str, content: str) -> None:
+        """Store content under its etag; identical versions share one blob."""
+        blob_path = self._blob_path(etag)
+        if blob_path.exists():
+            return
+        blob_path.parent.mkdir(exist_ok=True)
+        async with aiofiles.open(blob_path, "wb") as f:
+            await f.write(content.encode('utf-8'))
+
+    async def _prune_blobs(self) -> None:
+        """Delete content blobs no longer referenced by any live version."""
+        live_etags = {v.etag for v in self._edit_versions.values()}
+
+        def _unlink_unreferenced() -> int:
+            removed = 0
+            with os.scandir(self._blobs_dir) as shards:
+                for shard in shards:
+                    if not shard.is_dir(follow_symlinks=False):
+                        continue
+                    with os.scandir(shard.path) as blobs:
+                        for blob in blobs:
+                            if blob.name not in live_etags:
+                                os.unlink(blob.path)
+                                removed += 1
+            return removed
+
+        removed = await asyncio.to_thread(_unlink_unreferenced)
+        if removed:
+            logger.info(f"Pruned {removed} unreferenced content blobs")
+
+    async def _read_blob(self, etag: str) -> str:
+        try:
+            async with aiofiles.open(self._blob_path(etag), "rb") as f:
+                return (await f.read()).decode('utf-8')
+        except FileNotFoundError:
+            logger.warning(f"Missing content blob for etag {etag}")
+            return ""
+
+    async def _read_log(self, kind: str, legacy_name: str, legacy_key: str) -> List[Dict[str, Any]]:
+        """Read raw records from a category log without blocking the loop.
+
+        Prefers the append-only JSONL log; falls back to the legacy
+        whole-file JSON layout so existing stores load unchanged (the next
+        compaction rewrites them in the new format).
+        """
+        try:
+            async with aiofiles.open(self._log_path(kind), "rb") as f:
+                raw = await f.read()
+        except FileNotFoundError:
+            legacy_file = self.versions_dir / legacy_name
+            try:
+                async with aiofiles.open(legacy_file, "rb") as f:
+                    raw = await f.read()
+            except FileNotFoundError:
+                return []
+            return orjson.loads(raw).get(legacy_key, [])
+        lines = raw.splitlines()
+        self._log_lines[kind] = len(lines)
+        return [orjson.loads(line) for line in lines if line]
+
+    def _enqueue_records(self, kind: str, records: List[Dict[str, Any]]) -> None:
+        """Queue records for the writer task without touching disk."""
+        self._pending[kind].extend(records)
+        self._write_event.set()
+
+    async def _writer_loop(self) -> None:
+        """Debounce bursts of mutations into one append per log.
+
+        A short sleep after the first enqueue lets e.g. twenty agent edits
+        in quick succession land as a single write instead of twenty.
+        """
+        while True:
+            await self._write_event.wait()
+            await asyncio.sleep(0.05)
+            self._write_event.clear()
             try:
-                data = json.loads(operations_file.read_text())
-                for op_data in data.get('operations', []):
-                    op = EditOperation.from_dict(op_data)
-                    self._edit_operations[op.id] = op
+                await self._flush_pending()
             except Exception as e:
-                logger.error(f"Failed to load edit operations: {e}")
-    
+                logger.error(f"Failed to flush edit logs: {e}")
+
+    async def _flush_pending(self) -> None:
+        for kind in self._pending:
+            records = self._pending[kind]
+            if records:
+                self._pending[kind] = []
+                try:
+                    await self._append_records(kind, records)
+                except asyncio.CancelledError:
+                    # Re-queue the detached batch so a later flush still
+                    # writes it; a duplicate append is harmless because
+                    # re-appended records supersede earlier lines on load.
+                    self._pending[kind] = records + self._pending[kind]
+                    raise
+
+    async def flush(self) -> None:
+        """Write any queued records to disk (shutdown and tests)."""
+        await self._flush_pending()
+
+    async def aclose(self) -> None:
+        """Stop the background writer after draining queued records."""
+        # Drain first so a cancel can't land mid-append; anything the
+        # cancelled writer had detached is re-queued by _flush_pending,
+        # so the final flush below picks it up.
+        await self._flush_pending()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        await self._flush_pending()
+
+    async def _append_records(self, kind: str, records: List[Dict[str, Any]]) -> None:
+        """Append records to a category log: O(records) per mutation.
+
+        A record re-appended after mutation supersedes its earlier lines on
+        load, so updates never force a whole-file rewrite.
+        """
+        payload = b"".join(orjson.dumps(record) + b"\n" for record in records)
+        async with self._log_locks[kind]:
+            async with aiofiles.open(self._log_path(kind), "ab") as f:
+                await f.write(payload)
+        self._log_lines[kind] += len(records)
+
+    async def _rewrite_log(self, kind: str, records: List[Dict[str, Any]]) -> None:
+        """Compact a category log down to its live records."""
+        payload = b"".join(orjson.dumps(record) + b"\n" for record in records)
+        async with self._log_locks[kind]:
+            async with aiofiles.open(self._log_path(kind), "wb") as f:
+                await f.write(payload)
+        self._log_lines[kind] = len(records)
+
+    async def _compact_edit_operations(self) -> None:
+        self._pending["operations"].clear()  # the rewrite covers queued records
+        await self._rewrite_log("operations", [op.to_dict() for op in self._edit_operations.values()])
+
+    async def _compact_edit_versions(self) -> None:
+        self._pending["versions"].clear()
+        await self._rewrite_log("versions", [v.to_dict() for v in self._edit_versions.values()])
+
+    async def _compact_edit_conflicts(self) -> None:
+        self._pending["conflicts"].clear()
+        await self._rewrite_log("conflicts", [c.to_dict() for c in self._edit_conflicts.values()])
+
+    async def _load_edit_operations(self):
+        """Load edit operations from storage."""
+        try:
+            for op_data in await self._read_log("operations", "edit_operations.json", "operations"):
+                op = EditOperation.from_dict(op_data)
+                self._edit_operations[op.id] = op
+                self._index_operation(op)
+        except Exception as e:
+            logger.error(f"Failed to load edit operations: {e}")
+
     async def _load_edit_versions(self):
         """Load edit versions from storage."""
-        versions_file = self.versions_dir / "edit_versions.json"
-        if versions_file.exists():
-            try:
-                data = json.loads(versions_file.read_text())
-                for version_data in data.get('versions', []):
-                    version = EditVersion.from_dict(version_data)
-                    self._edit_versions[version.version_id] = version
-            except Exception as e:
-                logger.error(f"Failed to load edit versions: {e}")
-    
+        try:
+            for version_data in await self._read_log("versions", "edit_versions.json", "versions"):
+                version = EditVersion.from_dict(version_data)
+                if 'content' not in version_data:
+                    version.content = await self._read_blob(version.etag)
+                self._edit_versions[version.version_id] = version
+                if version.source == EditSource.USER and version.owner != "pre_agent_backup":
+                    self._user_version_paths.add(version.file_path)
+            # Index after the id-keyed dedup so superseded log lines don't
+            # appear twice in the per-path lists.
+            for version in self._edit_versions.values():
+                self._index_version(version)
+        except Exception as e:
+            logger.error(f"Failed to load edit versions: {e}")
+
     async def _load_edit_conflicts(self):
         """Load edit conflicts from storage."""
-        conflicts_file = self.versions_dir / "edit_conflicts.json"
-        if conflicts_file.exists():
-            try:
-                data = json.loads(conflicts_file.read_text())
-                for conflict_data in data.get('conflicts', []):
-                    conflict = EditConflict.from_dict(conflict_data)
-                    self._edit_conflicts[conflict.conflict_id] = conflict
-            except Exception as e:
-                logger.error(f"Failed to load edit conflicts: {e}")
-    
-    async def _save_edit_operations(self):
-        """Save edit operations to storage."""
-        operations_file = self.versions_dir / "edit_operations.json"
-        data = {
-            'operations': [op.to_dict() for op in self._edit_operations.values()]
-        }
-        operations_file.write_text(json.dumps(data, indent=2))
-    
-    async def _save_edit_versions(self):
-        """Save edit versions to storage."""
-        versions_file = self.versions_dir / "edit_versions.json"
-        data = {
-            'versions': [version.to_dict() for version in self._edit_versions.values()]
-        }
-        versions_file.write_text(json.dumps(data, indent=2))
-    
-    async def _save_edit_conflicts(self):
-        """Save edit conflicts to storage."""
-        conflicts_file = self.versions_dir / "edit_conflicts.json"
-        data = {
-            'conflicts': [conflict.to_dict() for conflict in self._edit_conflicts.values()]
-        }
-        conflicts_file.write_text(json.dumps(data, indent=2))
+        try:
+            for conflict_data in await self._read_log("conflicts", "edit_conflicts.json", "conflicts"):
+                conflict = EditConflict.from_dict(conflict_data)
+                self._edit_conflicts[conflict.conflict_id] = conflict
+            for conflict in self._edit_conflicts.values():
+                self._index_conflict(conflict)
+        except Exception as e:
+            logger.error(f"Failed to load edit conflicts: {e}")
     
     def _generate_etag(self, content: str) -> str:
         """Generate ETag for content."""
+        if xxhash is not None:
+            return xxhash.xxh3_128(content.encode('utf-8')).hexdigest()
         return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _index_version(self, version: EditVersion) -> None:
+        """Maintain the per-path sorted list and latest pointers."""
+        # insort keeps each per-path list ordered by timestamp, so history
+        # reads never sort; live inserts append in O(1) since timestamps
+        # are monotonic, and only replayed legacy data pays the shift.
+        bisect.insort(
+            self._versions_by_path.setdefault(version.file_path, []),
+            version,
+            key=lambda v: v.timestamp_ns,
+        )
+        key = (version.file_path, version.source)
+        latest = self._latest_by_path_source.get(key)
+        if latest is None or version.timestamp_ns >= latest.timestamp_ns:
+            self._latest_by_path_source[key] = version
+        latest_any = self._latest_any_by_path.get(version.file_path)
+        if latest_any is None or version.timestamp_ns >= latest_any.timestamp_ns:
+            self._latest_any_by_path[version.file_path] = version
+
+    def _index_conflict(self, conflict: EditConflict) -> None:
+        """Maintain the per-path conflict list."""
+        self._conflicts_by_path.setdefault(conflict.file_path, []).append(conflict)
+
+    def _index_operation(self, operation: EditOperation) -> None:
+        """Add an operation to the per-path unsaved index if applicable."""
+        if operation.metadata.get("unsaved", False):
+            self._unsaved_by_path.setdefault(operation.file_path, {})[operation.id] = operation
+
+    def _discard_operation(self, operation_id: str) -> None:
+        """Remove an operation from the cache and the unsaved index."""
+        operation = self._edit_operations.pop(operation_id, None)
+        if operation is None:
+            return
+        per_path = self._unsaved_by_path.get(operation.file_path)
+        if per_path is not None:
+            per_path.pop(operation_id, None)
+            if not per_path:
+                del self._unsaved_by_path[operation.file_path]
+
+    async def drop_operations(self, operation_ids) -> int:
+        """Remove a batch of operations and persist with a single save."""
+        dropped = 0
+        for operation_id in operation_ids:
+            if operation_id in self._edit_operations:
+                self._discard_operation(operation_id)
+                dropped += 1
+        if dropped:
+            # Deletions can't be expressed as appends; compact instead.
+            await self._compact_edit_operations()
+        return dropped
+
+    def get_unsaved_for_path(self, file_path: str) -> List[EditOperation]:
+        """Return unsaved (frontend) operations for a file via the index."""
+        per_path = self._unsaved_by_path.get(file_path)
+        return list(per_path.values()) if per_path else []
+
+    def has_concurrent_edits(self, file_path: str) -> bool:
+        """Cheap check for user activity on a file, without version scans.
+
+        A stale positive only costs the caller the full lookup it would have
+        done anyway; a negative is always safe to trust.
+        """
+        return bool(self._unsaved_by_path.get(file_path)) or file_path in self._user_version_paths
     
     async def record_edit_operation(
         self,
@@ -273,10 +595,33 @@ class EditVersionManager:
         )
         
         self._edit_operations[operation.id] = operation
-        await self._save_edit_operations()
-        
+        self._index_operation(operation)
+        self._enqueue_records("operations", [operation.to_dict()])
+
         logger.info(f"Recorded edit operation {operation.id} for {file_path} by {owner}")
         return operation
+
+    async def record_edit_operations(self, ops: List[Dict[str, Any]]) -> List[EditOperation]:
+        """Record several edit operations with a single persistence write.
+
+        Each entry in ops is a dict of EditOperation fields (minus id and
+        timestamp, which are generated here).
+        """
+        operations: List[EditOperation] = []
+        for op_kwargs in ops:
+            operation = EditOperation(
+                id=str(uuid4()),
+                timestamp=datetime.now(timezone.utc),
+                **op_kwargs
+            )
+            self._edit_operations[operation.id] = operation
+            self._index_operation(operation)
+            operations.append(operation)
+
+        if operations:
+            self._enqueue_records("operations", [op.to_dict() for op in operations])
+            logger.info(f"Recorded {len(operations)} edit operations in one batch")
+        return operations
     
     async def create_edit_version(
         self,
@@ -299,36 +644,42 @@ class EditVersionManager:
             base_version_id=base_version_id,
             edit_operations=edit_operation_ids or []
         )
-        
+
+        await self._store_blob(version.etag, content)
         self._edit_versions[version.version_id] = version
-        await self._save_edit_versions()
+        self._index_version(version)
+        if source == EditSource.USER and owner != "pre_agent_backup":
+            self._user_version_paths.add(file_path)
+        self._enqueue_records("versions", [version.to_dict()])
         
         logger.info(f"Created edit version {version.version_id} for {file_path} by {owner}")
         return version
     
     async def get_latest_version(self, file_path: str, source: Optional[EditSource] = None) -> Optional[EditVersion]:
         """Get the latest version of a file, optionally filtered by source."""
-        versions = [
-            v for v in self._edit_versions.values()
-            if v.file_path == file_path and (source is None or v.source == source)
-        ]
-        
-        if not versions:
-            return None
-        
-        return max(versions, key=lambda v: v.timestamp)
-    
+        if source is not None:
+            return self._latest_by_path_source.get((file_path, source))
+        return self._latest_any_by_path.get(file_path)
+
     async def get_versions_for_file(self, file_path: str) -> List[EditVersion]:
         """Get all versions for a specific file."""
-        return [
-            v for v in self._edit_versions.values()
-            if v.file_path == file_path
-        ]
+        return list(self._versions_by_path.get(file_path, ()))
     
-    async def detect_conflicts(self, file_path: str) -> List[EditConflict]:
-        """Detect conflicts between user and agent versions."""
-        user_version = await self.get_latest_version(file_path, EditSource.USER)
-        agent_version = await self.get_latest_version(file_path, EditSource.AGENT)
+    async def detect_conflicts(
+        self,
+        file_path: str,
+        user_version: Optional[EditVersion] = None,
+        agent_version: Optional[EditVersion] = None
+    ) -> List[EditConflict]:
+        """Detect conflicts between user and agent versions.
+
+        Callers that already hold the latest versions pass them in to skip
+        the repeated lookups.
+        """
+        if user_version is None:
+            user_version = await self.get_latest_version(file_path, EditSource.USER)
+        if agent_version is None:
+            agent_version = await self.get_latest_version(file_path, EditSource.AGENT)
         
         conflicts = []
         
@@ -337,8 +688,8 @@ class EditVersionManager:
             if user_version.etag != agent_version.etag:
                 # Look for existing unresolved conflicts
                 existing_conflicts = [
-                    c for c in self._edit_conflicts.values()
-                    if c.file_path == file_path and not c.resolved
+                    c for c in self._conflicts_by_path.get(file_path, ())
+                    if not c.resolved
                 ]
                 
                 if not existing_conflicts:
@@ -352,14 +703,21 @@ class EditVersionManager:
                     )
                     
                     self._edit_conflicts[conflict.conflict_id] = conflict
+                    self._index_conflict(conflict)
                     conflicts.append(conflict)
                     
                     # Update version conflict references
                     user_version.conflicts.append(conflict.conflict_id)
                     agent_version.conflicts.append(conflict.conflict_id)
-                    
-                    await self._save_edit_conflicts()
-                    await self._save_edit_versions()
+                    user_version._cached_dict = None
+                    agent_version._cached_dict = None
+
+                    self._enqueue_records("conflicts", [conflict.to_dict()])
+                    # Re-append the mutated versions; later lines supersede
+                    # their earlier ones on load.
+                    self._enqueue_records(
+                        "versions", [user_version.to_dict(), agent_version.to_dict()]
+                    )
         
         return conflicts
     
@@ -392,12 +750,12 @@ class EditVersionManager:
             return user_version.content, []
         
         # Both versions exist - check for conflicts
-        conflicts = await self.detect_conflicts(file_path)
+        conflicts = await self.detect_conflicts(file_path, user_version, agent_version)
         unresolved_conflicts = [c for c in conflicts if not c.resolved]
         
         if not unresolved_conflicts:
             # No conflicts, return the most recent version
-            latest_version = max([user_version, agent_version], key=lambda v: v.timestamp)
+            latest_version = max([user_version, agent_version], key=lambda v: v.timestamp_ns)
             return latest_version.content, []
         
         # Handle conflicts based on strategy
@@ -415,14 +773,11 @@ class EditVersionManager:
     
     async def _merge_versions(self, user_version: EditVersion, agent_version: EditVersion) -> Tuple[str, List[EditConflict]]:
         """Attempt to automatically merge two versions."""
-        user_content = user_version.content
-        agent_content = agent_version.content
-        
         # Simple merge strategy: try to apply agent edits to user content
         # This is a basic implementation - more sophisticated merging could be added
-        
+
         # For now, if the files are too different, we'll require manual resolution
-        if self._content_similarity(user_content, agent_content) < 0.8:
+        if self._content_similarity(user_version, agent_version) < 0.8:
             conflict = EditConflict(
                 conflict_id=str(uuid4()),
                 file_path=user_version.file_path,
@@ -433,7 +788,8 @@ class EditVersionManager:
             )
             
             self._edit_conflicts[conflict.conflict_id] = conflict
-            await self._save_edit_conflicts()
+            self._index_conflict(conflict)
+            self._enqueue_records("conflicts", [conflict.to_dict()])
             
             return "", [conflict]
         
@@ -454,52 +810,69 @@ class EditVersionManager:
             )
             
             self._edit_conflicts[conflict.conflict_id] = conflict
-            await self._save_edit_conflicts()
+            self._index_conflict(conflict)
+            self._enqueue_records("conflicts", [conflict.to_dict()])
             
             return "", [conflict]
     
-    def _content_similarity(self, content1: str, content2: str) -> float:
-        """Calculate similarity between two content strings."""
-        if not content1 and not content2:
+    def _content_similarity(self, version1: EditVersion, version2: EditVersion) -> float:
+        """Calculate similarity between two versions' contents."""
+        if not version1.content and not version2.content:
             return 1.0
-        if not content1 or not content2:
+        if not version1.content or not version2.content:
             return 0.0
-        
-        # Simple similarity based on common lines
-        lines1 = set(content1.splitlines())
-        lines2 = set(content2.splitlines())
-        
+
+        # Simple similarity based on common lines; the line sets are cached
+        # on the versions so repeated conflict checks don't re-split.
+        lines1 = version1.lines_set
+        lines2 = version2.lines_set
+
         if not lines1 and not lines2:
             return 1.0
-        
+
         intersection = len(lines1.intersection(lines2))
         union = len(lines1.union(lines2))
-        
+
         return intersection / union if union > 0 else 0.0
     
     async def _apply_agent_edits_to_user_content(self, user_version: EditVersion, agent_version: EditVersion) -> str:
         """Apply agent edits to user content."""
         user_content = user_version.content
-        agent_content = agent_version.content
-        
-        # Get agent edit operations
+
+        # Fetch the agent's operations by id, preserving their order
         agent_operations = [
-            op for op in self._edit_operations.values()
-            if op.id in agent_version.edit_operations
+            self._edit_operations[op_id]
+            for op_id in agent_version.edit_operations
+            if op_id in self._edit_operations
         ]
-        
-        # Apply each agent operation to user content
-        result = user_content
+
+        # Queue each operation's replacement under its search literal; each
+        # entry is consumed at most once, preserving replace(..., 1) limits.
+        pending: Dict[str, List[str]] = {}
         for operation in agent_operations:
             if operation.edit_type == EditType.SEARCH_REPLACE:
                 if operation.search_text and operation.replace_text:
-                    result = result.replace(operation.search_text, operation.replace_text, 1)
+                    pending.setdefault(operation.search_text, []).append(operation.replace_text)
             elif operation.edit_type == EditType.FULL_CONTENT:
                 # For full content, we need to be more careful
                 # This might indicate a major conflict
                 raise ValueError("Full content edit conflicts require manual resolution")
-        
-        return result
+
+        if not pending:
+            return user_content
+
+        # One compiled alternation walks the content once instead of one
+        # full scan (and string reallocation) per operation. Longer
+        # literals come first so the most specific match wins.
+        pattern = re.compile(
+            "|".join(re.escape(text) for text in sorted(pending, key=len, reverse=True))
+        )
+
+        def _replace(match: re.Match) -> str:
+            queue = pending.get(match.group(0))
+            return queue.pop(0) if queue else match.group(0)
+
+        return pattern.sub(_replace, user_content)
     
     async def resolve_conflict(
         self,
@@ -514,6 +887,7 @@ class EditVersionManager:
         conflict = self._edit_conflicts[conflict_id]
         conflict.resolved = True
         conflict.resolution_notes = resolution_notes
+        conflict._cached_dict = None
         
         # Create resolved version
         resolved_version = await self.create_edit_version(
@@ -525,16 +899,19 @@ class EditVersionManager:
         )
         
         conflict.resolved_version_id = resolved_version.version_id
-        
-        await self._save_edit_conflicts()
+        conflict._cached_dict = None
+
+        # Re-append the mutated conflict; the latest line wins on load.
+        self._enqueue_records("conflicts", [conflict.to_dict()])
         
         logger.info(f"Resolved conflict {conflict_id} with version {resolved_version.version_id}")
         return resolved_version
     
     async def get_file_history(self, file_path: str) -> List[Dict[str, Any]]:
         """Get complete history for a file."""
+        # _versions_by_path lists stay sorted by timestamp, so the copy is
+        # already in history order.
         versions = await self.get_versions_for_file(file_path)
-        versions.sort(key=lambda v: v.timestamp)
         
         history = []
         for version in versions:
@@ -553,19 +930,41 @@ class EditVersionManager:
     
     async def cleanup_old_versions(self, max_versions_per_file: int = 50):
         """Clean up old versions to prevent storage bloat."""
-        files = set(v.file_path for v in self._edit_versions.values())
-        
-        for file_path in files:
-            versions = await self.get_versions_for_file(file_path)
-            if len(versions) > max_versions_per_file:
-                # Keep the most recent versions
-                versions.sort(key=lambda v: v.timestamp, reverse=True)
-                versions_to_keep = versions[:max_versions_per_file]
-                versions_to_remove = versions[max_versions_per_file:]
-                
-                for version in versions_to_remove:
-                    del self._edit_versions[version.version_id]
-                
-                logger.info(f"Cleaned up {len(versions_to_remove)} old versions for {file_path}")
-        
-        await self._save_edit_versions()
+        removed_any = False
+        for file_path, versions in self._versions_by_path.items():
+            if len(versions) <= max_versions_per_file:
+                continue
+
+            # The per-path list is sorted by timestamp, so the newest
+            # records are simply the tail.
+            versions_to_keep = versions[-max_versions_per_file:]
+            versions_to_remove = versions[:-max_versions_per_file]
+
+            for version in versions_to_remove:
+                del self._edit_versions[version.version_id]
+            removed_any = True
+
+            # Repair the per-path indexes for this file.
+            self._versions_by_path[file_path] = versions_to_keep
+            self._latest_any_by_path[file_path] = versions_to_keep[-1]
+            for source in EditSource:
+                key = (file_path, source)
+                remaining = [v for v in versions_to_keep if v.source == source]
+                if remaining:
+                    self._latest_by_path_source[key] = remaining[-1]
+                else:
+                    self._latest_by_path_source.pop(key, None)
+
+            logger.info(f"Cleaned up {len(versions_to_remove)} old versions for {file_path}")
+
+        await self._compact_edit_versions()
+        if removed_any:
+            # The pruned versions were the only holders of their contents;
+            # drop any blobs no surviving version references.
+            await self._prune_blobs()
+        # Opportunistically compact the other logs once superseded lines
+        # outnumber live records.
+        if self._log_lines["operations"] > 2 * len(self._edit_operations):
+            await self._compact_edit_operations()
+        if self._log_lines["conflicts"] > 2 * len(self._edit_conflicts):
+            await self._compact_edit_conflicts()
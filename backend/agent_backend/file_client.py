@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from dataclasses import dataclass
 from typing import Any, Optional
 
 import httpx
+import orjson
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+# Generous pool with keepalive so hot read/write loops reuse connections
+# instead of paying a TCP handshake per burst; connect gets a tighter
+# deadline than the overall request.
+_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=30.0)
+_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
 
 _shared_client: Optional[httpx.AsyncClient] = None
 
@@ -12,14 +22,84 @@ _shared_client: Optional[httpx.AsyncClient] = None
 def _get_shared_client() -> httpx.AsyncClient:
     global _shared_client
     if _shared_client is None:
-        _shared_client = httpx.AsyncClient(timeout=10.0)
+        try:
+            # HTTP/2 multiplexes concurrent requests over one connection;
+            # needs the optional h2 package.
+            _shared_client = httpx.AsyncClient(http2=True, timeout=_TIMEOUT, limits=_LIMITS)
+        except ImportError:
+            _shared_client = httpx.AsyncClient(timeout=_TIMEOUT, limits=_LIMITS)
     return _shared_client
 
 
+async def aclose_shared_client() -> None:
+    """Close the shared httpx client (called on app shutdown)."""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
+
 def _base_url_from_env() -> str:
     return os.getenv("FILE_STORE_URL", "http://localhost:8000/files").rstrip("/")
 
 
+# Reads issued within a short window are coalesced into a single
+# /batch_read call: one round trip per burst instead of one per path.
+# Keyed by base_url so clients pointed at different stores don't mix.
+_BATCH_WINDOW = 0.002
+_pending_reads: dict[str, dict[str, list[asyncio.Future]]] = {}
+_flush_scheduled: set[str] = set()
+
+
+async def _flush_reads(base_url: str) -> None:
+    await asyncio.sleep(_BATCH_WINDOW)
+    _flush_scheduled.discard(base_url)
+    batch = _pending_reads.pop(base_url, None)
+    if not batch:
+        return
+    try:
+        client = _get_shared_client()
+        resp = await client.post(
+            f"{base_url}/batch_read",
+            content=orjson.dumps({"paths": list(batch)}),
+            headers=_JSON_HEADERS,
+        )
+        resp.raise_for_status()
+        results = orjson.loads(resp.content).get("results", [])
+    except Exception as exc:
+        for futures in batch.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+        return
+    for entry in results:
+        futures = batch.pop(entry["path"], None)
+        if futures is None:
+            continue
+        for future in futures:
+            if future.done():
+                continue
+            if entry.get("error"):
+                future.set_exception(FileNotFoundError(entry["error"]))
+            else:
+                future.set_result(entry)
+    # Paths the server did not answer for (shouldn't happen, but never
+    # leave a caller hanging on an unresolved future).
+    for path, futures in batch.items():
+        for future in futures:
+            if not future.done():
+                future.set_exception(FileNotFoundError(f"No batch result for '{path}'"))
+
+
+def _enqueue_read(base_url: str, path: str) -> asyncio.Future:
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _pending_reads.setdefault(base_url, {}).setdefault(path, []).append(future)
+    if base_url not in _flush_scheduled:
+        _flush_scheduled.add(base_url)
+        asyncio.create_task(_flush_reads(base_url))
+    return future
+
+
 @dataclass
 class HTTPFileClient:
     base_url: str
@@ -29,32 +109,57 @@ class HTTPFileClient:
         return cls(_base_url_from_env())
 
     async def read(self, path: str, encoding: Optional[str] = None) -> dict[str, Any]:
+        if encoding is None:
+            # Default-encoding reads go through the coalescing batch path;
+            # an explicit encoding is rare enough to keep on its own call.
+            return await _enqueue_read(self.base_url, path)
         client = _get_shared_client()
         resp = await client.post(
             f"{self.base_url}/read",
-            json={"path": path, "encoding": encoding},
+            content=orjson.dumps({"path": path, "encoding": encoding}),
+            headers=_JSON_HEADERS,
         )
         resp.raise_for_status()
-        return resp.json()
+        return orjson.loads(resp.content)
 
     async def write(self, path: str, content: str, encoding: Optional[str] = None) -> dict[str, Any]:
+        if encoding is None and isinstance(content, bytes):
+            return await self.write_bytes(path, content)
         client = _get_shared_client()
         resp = await client.post(
             f"{self.base_url}/write",
-            json={"path": path, "content": content, "encoding": encoding},
+            content=orjson.dumps({"path": path, "content": content, "encoding": encoding}),
+            headers=_JSON_HEADERS,
+        )
+        resp.raise_for_status()
+        return orjson.loads(resp.content)
+
+    async def write_bytes(self, path: str, data: bytes) -> dict[str, Any]:
+        """Write raw bytes without a JSON envelope.
+
+        Skips the JSON string-escape pass (and any base64 step upstream
+        callers would otherwise need), so large binary payloads go over
+        the wire at their actual size.
+        """
+        client = _get_shared_client()
+        resp = await client.post(
+            f"{self.base_url}/write_binary",
+            params={"path": path},
+            content=data,
+            headers={"content-type": "application/octet-stream"},
         )
         resp.raise_for_status()
-        return resp.json()
+        return orjson.loads(resp.content)
 
     async def list_files(self) -> list[str]:
         client = _get_shared_client()
         resp = await client.get(f"{self.base_url}/list")
         resp.raise_for_status()
-        body = resp.json()
+        body = orjson.loads(resp.content)
         return body.get("files", [])
 
     async def delete(self, path: str) -> dict[str, Any]:
         client = _get_shared_client()
         resp = await client.delete(f"{self.base_url}/delete", params={"path": path})
         resp.raise_for_status()
-        return resp.json()
+        return orjson.loads(resp.content)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
 import logging
 import time
 import uuid
@@ -26,51 +27,84 @@ class FileLock:
 
 @dataclass
 class FileVersion:
-    """Represents a file version for conflict detection."""
+    """Represents a file version for conflict detection.
+
+    Deliberately holds no file content: conflict checks only compare the
+    ETag, and keeping bodies here scaled memory with total bytes written.
+    """
     file_path: str
     version: int
     etag: str
-    content: str
+    size: int  # encoded byte length, for cheap conflict pre-checks
     created_at: float
     owner: str
 
 
+# Lock and version maps are split into fixed shards keyed by path hash;
+# each lookup touches a smaller dict, and multi-worker setups contend on
+# a shard instead of one global map.
+_NUM_SHARDS = 16
+
+
 class FileLockManager:
     """Manages file locks and prevents race conditions."""
     
     def __init__(self, lock_timeout: float = 30.0):
-        self._locks: Dict[str, FileLock] = {}
-        self._versions: Dict[str, FileVersion] = {}
+        self._lock_shards: list[Dict[str, FileLock]] = [{} for _ in range(_NUM_SHARDS)]
+        self._version_shards: list[Dict[str, FileVersion]] = [{} for _ in range(_NUM_SHARDS)]
         self._lock_timeout = lock_timeout
-        self._lock_semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Paths with an operation in flight, guarded by one condition.
+        # Unlike the old per-path Semaphore map this holds memory
+        # proportional to concurrency, not to every path ever seen.
+        self._busy: Set[str] = set()
+        self._busy_cond = asyncio.Condition()
+        # Min-heap of (expires_at, lock_id, file_path) so the cleanup task
+        # sleeps until the next possible expiry instead of sweeping every
+        # lock on a fixed interval. Normal releases leave stale entries;
+        # the lock_id check on pop discards them.
+        self._expiry_heap: list[tuple[float, str, str]] = []
+        self._expiry_event = asyncio.Event()
         self._cleanup_task: Optional[asyncio.Task] = None
         self._start_cleanup_task()
+
+    def _locks_for(self, file_path: str) -> Dict[str, FileLock]:
+        return self._lock_shards[hash(file_path) & (_NUM_SHARDS - 1)]
+
+    def _versions_for(self, file_path: str) -> Dict[str, FileVersion]:
+        return self._version_shards[hash(file_path) & (_NUM_SHARDS - 1)]
     
     def _start_cleanup_task(self):
         """Start background task to clean up expired locks."""
         async def cleanup_expired_locks():
             while True:
                 try:
-                    await asyncio.sleep(5)  # Check every 5 seconds
+                    if not self._expiry_heap:
+                        # Nothing to expire; sleep until a lock is pushed.
+                        await self._expiry_event.wait()
+                        self._expiry_event.clear()
+                        continue
+                    delay = self._expiry_heap[0][0] - time.time()
+                    if delay > 0:
+                        try:
+                            # A wake here means a new lock was pushed and the
+                            # heap top may have changed; recompute the delay.
+                            await asyncio.wait_for(self._expiry_event.wait(), timeout=delay)
+                            self._expiry_event.clear()
+                            continue
+                        except asyncio.TimeoutError:
+                            pass
                     current_time = time.time()
-                    expired_locks = [
-                        path for path, lock in self._locks.items()
-                        if current_time > lock.expires_at
-                    ]
-                    for path in expired_locks:
-                        logger.warning(f"Cleaning up expired lock for {path}")
-                        self._release_lock(path)
+                    while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+                        _, lock_id, path = heapq.heappop(self._expiry_heap)
+                        current = self._locks_for(path).get(path)
+                        if current is not None and current.lock_id == lock_id:
+                            logger.warning(f"Cleaning up expired lock for {path}")
+                            self._release_lock(path)
                 except Exception as e:
                     logger.error(f"Error in lock cleanup task: {e}")
-        
+
         self._cleanup_task = asyncio.create_task(cleanup_expired_locks())
     
-    def _get_semaphore(self, file_path: str) -> asyncio.Semaphore:
-        """Get or create a semaphore for a file path."""
-        if file_path not in self._lock_semaphores:
-            self._lock_semaphores[file_path] = asyncio.Semaphore(1)
-        return self._lock_semaphores[file_path]
-    
     @asynccontextmanager
     async def acquire_lock(
         self,
@@ -85,14 +119,19 @@ class FileLockManager:
         acquired_time = time.time()
         expires_at = acquired_time + (timeout or self._lock_timeout)
         
-        # Wait for semaphore (prevents multiple operations on same file)
-        semaphore = self._get_semaphore(file_path)
-        await asyncio.wait_for(semaphore.acquire(), timeout=timeout or self._lock_timeout)
-        
+        # Wait until no other operation is in flight for this path
+        async with self._busy_cond:
+            await asyncio.wait_for(
+                self._busy_cond.wait_for(lambda: file_path not in self._busy),
+                timeout=timeout or self._lock_timeout
+            )
+            self._busy.add(file_path)
+
         try:
             # Check if file is already locked
-            if file_path in self._locks:
-                existing_lock = self._locks[file_path]
+            locks = self._locks_for(file_path)
+            existing_lock = locks.get(file_path)
+            if existing_lock is not None:
                 if time.time() < existing_lock.expires_at:
                     raise FileLockedError(
                         f"File {file_path} is locked by {existing_lock.owner} "
@@ -113,7 +152,9 @@ class FileLockManager:
                 context=context
             )
             
-            self._locks[file_path] = lock
+            locks[file_path] = lock
+            heapq.heappush(self._expiry_heap, (expires_at, lock_id, file_path))
+            self._expiry_event.set()
             logger.info(f"Acquired lock for {file_path} by {owner} ({operation_type})")
             
             yield lock
@@ -121,20 +162,44 @@ class FileLockManager:
         finally:
             # Always release the lock
             self._release_lock(file_path)
-            semaphore.release()
+            async with self._busy_cond:
+                self._busy.discard(file_path)
+                self._busy_cond.notify_all()
     
+    @asynccontextmanager
+    async def acquire_lock_with_version(
+        self,
+        file_path: str,
+        owner: str,
+        operation_type: str,
+        context: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        """Acquire a lock and hand back the current FileVersion in one call.
+
+        Saves callers a separate get_file_version round trip on every
+        lock-then-check operation.
+        """
+        async with self.acquire_lock(
+            file_path=file_path,
+            owner=owner,
+            operation_type=operation_type,
+            context=context,
+            timeout=timeout
+        ) as lock:
+            yield lock, self._versions_for(file_path).get(file_path)
+
     def _release_lock(self, file_path: str):
         """Release a file lock."""
-        if file_path in self._locks:
-            lock = self._locks.pop(file_path)
+        lock = self._locks_for(file_path).pop(file_path, None)
+        if lock is not None:
             logger.info(f"Released lock for {file_path} (was held by {lock.owner})")
     
     def is_locked(self, file_path: str) -> bool:
         """Check if a file is currently locked."""
-        if file_path not in self._locks:
+        lock = self._locks_for(file_path).get(file_path)
+        if lock is None:
             return False
-        
-        lock = self._locks[file_path]
         if time.time() > lock.expires_at:
             # Lock expired, clean it up
             self._release_lock(file_path)
@@ -144,10 +209,9 @@ class FileLockManager:
     
     def get_lock_info(self, file_path: str) -> Optional[FileLock]:
         """Get information about a file lock."""
-        if file_path not in self._locks:
+        lock = self._locks_for(file_path).get(file_path)
+        if lock is None:
             return None
-        
-        lock = self._locks[file_path]
         if time.time() > lock.expires_at:
             self._release_lock(file_path)
             return None
@@ -157,36 +221,30 @@ class FileLockManager:
     def update_file_version(
         self,
         file_path: str,
-        content: str,
         etag: str,
-        owner: str
+        owner: str,
+        size: int = 0
     ) -> FileVersion:
         """Update file version for conflict detection."""
-        current_version = self._versions.get(file_path, FileVersion(
-            file_path=file_path,
-            version=0,
-            etag="",
-            content="",
-            created_at=0,
-            owner=""
-        ))
-        
+        versions = self._versions_for(file_path)
+        current_version = versions.get(file_path)
+
         new_version = FileVersion(
             file_path=file_path,
-            version=current_version.version + 1,
+            version=(current_version.version if current_version else 0) + 1,
             etag=etag,
-            content=content,
+            size=size,
             created_at=time.time(),
             owner=owner
         )
         
-        self._versions[file_path] = new_version
+        versions[file_path] = new_version
         logger.debug(f"Updated version for {file_path} to v{new_version.version}")
         return new_version
     
     def get_file_version(self, file_path: str) -> Optional[FileVersion]:
         """Get current file version."""
-        return self._versions.get(file_path)
+        return self._versions_for(file_path).get(file_path)
     
     def check_conflict(
         self,
@@ -211,30 +269,40 @@ class FileLockManager:
     
     def force_release_lock(self, file_path: str, owner: str) -> bool:
         """Force release a lock (for admin operations)."""
-        if file_path in self._locks:
-            lock = self._locks[file_path]
-            if lock.owner == owner or owner == "admin":
-                self._release_lock(file_path)
-                return True
+        lock = self._locks_for(file_path).get(file_path)
+        if lock is not None and (lock.owner == owner or owner == "admin"):
+            self._release_lock(file_path)
+            return True
         return False
     
     def get_all_locks(self) -> Dict[str, FileLock]:
         """Get all current locks (for debugging)."""
         # Clean up expired locks first
         current_time = time.time()
-        expired = [path for path, lock in self._locks.items() if current_time > lock.expires_at]
+        expired = [
+            path
+            for shard in self._lock_shards
+            for path, lock in shard.items()
+            if current_time > lock.expires_at
+        ]
         for path in expired:
             self._release_lock(path)
-        
-        return self._locks.copy()
+
+        merged: Dict[str, FileLock] = {}
+        for shard in self._lock_shards:
+            merged.update(shard)
+        return merged
     
     def cleanup(self):
         """Clean up resources."""
         if self._cleanup_task:
             self._cleanup_task.cancel()
-        self._locks.clear()
-        self._versions.clear()
-        self._lock_semaphores.clear()
+        for shard in self._lock_shards:
+            shard.clear()
+        for shard in self._version_shards:
+            shard.clear()
+        self._busy.clear()
+        self._expiry_heap.clear()
 
 
 class FileLockedError(Exception):
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import os
+import shutil
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 
+try:  # optional fast non-cryptographic hashing for ETags
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
 from .agent import WORKSPACE_ROOT, DEFAULT_FILE_ENCODING, MAX_FILE_BYTES
 
 logger = logging.getLogger(__name__)
@@ -35,19 +42,39 @@ def _guard_file_size(path: Path) -> None:
         raise HTTPException(status_code=400, detail="File exceeds MAX_FILE_BYTES limit")
 
 
+# Directories already created this process; writes cluster in a few
+# directories, so most calls can skip the mkdir syscall entirely.
+_seen_dirs: set[str] = set()
+
+
 def _ensure_parent(path: Path) -> None:
+    parent = str(path.parent)
+    if parent in _seen_dirs:
+        return
     try:
         path.parent.mkdir(parents=True, exist_ok=True)
     except OSError as exc:
         raise HTTPException(status_code=400, detail=f"Unable to prepare directories for '{path}'") from exc
+    _seen_dirs.add(parent)
 
 
 def _etag_for_bytes(data: bytes) -> str:
+    # ETags only need collision resistance against accidental clashes, not
+    # cryptographic strength; xxh3 hashes large bodies several times
+    # faster than SHA-256.
+    if xxhash is not None:
+        return xxhash.xxh3_128(data).hexdigest()
     return hashlib.sha256(data).hexdigest()
 
 
-def _sync_to_directory(file_path: Path, content: str, encoding: str) -> None:
-    """Sync file content to the target directory for external access."""
+def _write_and_hash(target: Path, data: bytes) -> str:
+    """Write bytes and return their ETag; runs in a worker thread."""
+    target.write_bytes(data)
+    return _etag_for_bytes(data)
+
+
+def _sync_to_directory(file_path: Path, data: bytes) -> None:
+    """Sync already-encoded bytes to the target directory for external access."""
     try:
         # Create the sync target path
         sync_target = SYNC_DIRECTORY / file_path.relative_to(STORE_ROOT)
@@ -55,8 +82,8 @@ def _sync_to_directory(file_path: Path, content: str, encoding: str) -> None:
         # Ensure parent directories exist
         sync_target.parent.mkdir(parents=True, exist_ok=True)
         
-        # Write the content to the sync directory
-        sync_target.write_text(content, encoding=encoding)
+        # Reuse the bytes the store write already encoded
+        sync_target.write_bytes(data)
         
         logger.info(f"Synced file to directory: {sync_target}")
     except Exception as e:
@@ -80,6 +107,27 @@ class FileReadResponse(BaseModel):
     etag: str
 
 
+class BatchReadRequest(BaseModel):
+    paths: list[str]
+
+
+class BatchReadItem(BaseModel):
+    path: str
+    content: Optional[str] = None
+    etag: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchReadResponse(BaseModel):
+    results: list[BatchReadItem]
+
+
+class BinaryWriteResponse(BaseModel):
+    path: str
+    etag: str
+    size: int
+
+
 class FileListResponse(BaseModel):
     files: list[str] = Field(default_factory=list)
 
@@ -110,6 +158,32 @@ async def read_file(req: FileReadRequest) -> FileReadResponse:
     return FileReadResponse(path=rel, content=content, etag=etag)
 
 
+@router.post("/batch_read", response_model=BatchReadResponse)
+async def batch_read(req: BatchReadRequest) -> BatchReadResponse:
+    """Read many files in one round trip.
+
+    Each entry echoes the requested path so the client can demultiplex;
+    per-path failures are reported inline instead of failing the batch.
+    """
+    results: list[BatchReadItem] = []
+    for raw_path in req.paths:
+        try:
+            target = _resolve_user_path(raw_path)
+            if not target.exists():
+                raise HTTPException(status_code=404, detail=f"File '{raw_path}' does not exist")
+            _guard_file_size(target)
+            raw = target.read_bytes()
+            content = raw.decode(DEFAULT_FILE_ENCODING)
+        except HTTPException as exc:
+            results.append(BatchReadItem(path=raw_path, error=exc.detail))
+            continue
+        except UnicodeDecodeError:
+            results.append(BatchReadItem(path=raw_path, error="Invalid encoding for file"))
+            continue
+        results.append(BatchReadItem(path=raw_path, content=content, etag=_etag_for_bytes(raw)))
+    return BatchReadResponse(results=results)
+
+
 @router.post("/write", response_model=FileReadResponse)
 async def write_file(req: FileWriteRequest) -> FileReadResponse:
     target = _resolve_user_path(req.path)
@@ -117,26 +191,63 @@ async def write_file(req: FileWriteRequest) -> FileReadResponse:
     data = req.content.encode(req.encoding or DEFAULT_FILE_ENCODING)
     if len(data) > MAX_FILE_BYTES:
         raise HTTPException(status_code=400, detail="Updated content exceeds MAX_FILE_BYTES limit")
-    target.write_bytes(data)
-    etag = _etag_for_bytes(data)
+    # Write + hash and the sync copy both block on disk and CPU; run them
+    # in worker threads so a large body doesn't stall the event loop.
+    etag = await asyncio.to_thread(_write_and_hash, target, data)
     rel = str(target.relative_to(WORKSPACE_ROOT))
     
     # Sync to directory for external access
-    _sync_to_directory(target, req.content, req.encoding or DEFAULT_FILE_ENCODING)
+    await asyncio.to_thread(_sync_to_directory, target, data)
     
     return FileReadResponse(path=rel, content=req.content, etag=etag)
 
 
+@router.post("/write_binary", response_model=BinaryWriteResponse)
+async def write_binary(request: Request, path: str = Query(...)) -> BinaryWriteResponse:
+    """Write a raw request body to disk, bypassing the JSON envelope.
+
+    Counterpart to HTTPFileClient.write_bytes: binary payloads arrive at
+    their actual size instead of base64/JSON-escaped.
+    """
+    target = _resolve_user_path(path)
+    _ensure_parent(target)
+    data = await request.body()
+    if len(data) > MAX_FILE_BYTES:
+        raise HTTPException(status_code=400, detail="Updated content exceeds MAX_FILE_BYTES limit")
+    etag = await asyncio.to_thread(_write_and_hash, target, data)
+    rel = str(target.relative_to(WORKSPACE_ROOT))
+
+    # Sync raw bytes to directory for external access
+    await asyncio.to_thread(_sync_to_directory, target, data)
+
+    return BinaryWriteResponse(path=rel, etag=etag, size=len(data))
+
+
+def _walk_store(directory: str):
+    """Yield every file path under directory via scandir.
+
+    DirEntry answers is_dir/is_file from the directory entry itself, so
+    the walk avoids the per-entry stat() and Path allocation rglob pays.
+    """
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_store(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path
+
+
 @router.get("/list", response_model=FileListResponse)
 async def list_files() -> FileListResponse:
     if not STORE_ROOT.exists():
         return FileListResponse(files=[])
-    files: list[str] = []
-    for p in STORE_ROOT.rglob("*"):
-        if p.is_file():
-            files.append(str(p.relative_to(WORKSPACE_ROOT)))
-    files.sort()
-    return FileListResponse(files=files)
+
+    def _collect() -> list[str]:
+        files = [os.path.relpath(p, WORKSPACE_ROOT) for p in _walk_store(str(STORE_ROOT))]
+        files.sort()
+        return files
+
+    return FileListResponse(files=await asyncio.to_thread(_collect))
 
 
 @router.delete("/delete", response_model=DeleteResponse)
@@ -169,34 +280,43 @@ async def sync_all_files() -> SyncResponse:
     if not STORE_ROOT.exists():
         return SyncResponse(synced_files=[], errors=["File store does not exist"])
     
+    def _copy_one(file_path: Path) -> str:
+        # copyfile moves the bytes in-kernel instead of decoding to str
+        # and re-encoding to disk.
+        sync_target = SYNC_DIRECTORY / file_path.relative_to(STORE_ROOT)
+        sync_target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(file_path, sync_target)
+        logger.info(f"Synced file: {sync_target}")
+        return str(file_path.relative_to(WORKSPACE_ROOT))
+
+    # Bounds worker threads and open file descriptors while still keeping
+    # the disk queue busy.
+    sem = asyncio.Semaphore(32)
+
+    async def _sync_one(file_path: Path) -> str:
+        async with sem:
+            return await asyncio.to_thread(_copy_one, file_path)
+
     try:
         # Ensure sync directory exists
         SYNC_DIRECTORY.mkdir(parents=True, exist_ok=True)
-        
-        # Walk through all files in the store
-        for file_path in STORE_ROOT.rglob("*"):
-            if file_path.is_file():
-                try:
-                    # Read the file content
-                    content = file_path.read_text(encoding=DEFAULT_FILE_ENCODING)
-                    
-                    # Create sync target path
-                    sync_target = SYNC_DIRECTORY / file_path.relative_to(STORE_ROOT)
-                    sync_target.parent.mkdir(parents=True, exist_ok=True)
-                    
-                    # Write to sync directory
-                    sync_target.write_text(content, encoding=DEFAULT_FILE_ENCODING)
-                    
-                    synced_files.append(str(file_path.relative_to(WORKSPACE_ROOT)))
-                    logger.info(f"Synced file: {sync_target}")
-                    
-                except Exception as e:
-                    error_msg = f"Failed to sync {file_path.relative_to(WORKSPACE_ROOT)}: {e}"
-                    errors.append(error_msg)
-                    logger.warning(error_msg)
-        
+
+        files = await asyncio.to_thread(
+            lambda: [p for p in STORE_ROOT.rglob("*") if p.is_file()]
+        )
+        results = await asyncio.gather(
+            *(_sync_one(p) for p in files), return_exceptions=True
+        )
+        for file_path, result in zip(files, results):
+            if isinstance(result, BaseException):
+                error_msg = f"Failed to sync {file_path.relative_to(WORKSPACE_ROOT)}: {result}"
+                errors.append(error_msg)
+                logger.warning(error_msg)
+            else:
+                synced_files.append(result)
+
         logger.info(f"Sync completed: {len(synced_files)} files synced, {len(errors)} errors")
-        
+
     except Exception as e:
         error_msg = f"Sync operation failed: {e}"
         errors.append(error_msg)
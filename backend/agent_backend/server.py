@@ -17,11 +17,12 @@ from .agent import (
     agent,
     pop_run_state,
     push_run_state,
-    safe_read_text,
+    safe_read_text_async,
     DEFAULT_FILE,
+    aclose_edit_version_manager,
 )
 from .file_server import router as files_router
-from .file_client import HTTPFileClient
+from .file_client import HTTPFileClient, aclose_shared_client
 from .version_api import router as version_router
 
 logger = logging.getLogger(__name__)
@@ -46,7 +47,7 @@ async def _load_default_file() -> tuple[str, str]:
         data = await client.read(str(DEFAULT_FILE))
         return data["content"], data["path"]
     except Exception:
-        content, resolved = safe_read_text(str(DEFAULT_FILE))
+        content, resolved = await safe_read_text_async(str(DEFAULT_FILE))
         return content, str(resolved.relative_to(WORKSPACE_ROOT))
 
 
@@ -86,6 +87,14 @@ class FileResponse(BaseModel):
     content: str
 
 
+@app.on_event("shutdown")
+async def _shutdown_clients() -> None:
+    # Drain the version manager's debounced writer before stopping so
+    # records queued within the flush window aren't lost.
+    await aclose_edit_version_manager()
+    await aclose_shared_client()
+
+
 @app.get("/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -120,7 +120,7 @@ class AggregateEditsResponse(BaseModel):
 async def record_edit_operation(request: EditOperationRequest) -> EditOperationResponse:
     """Record a new edit operation."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Convert string enums
         source = EditSource(request.source)
@@ -172,7 +172,7 @@ async def create_edit_version(
 ) -> EditVersionResponse:
     """Create a new edit version."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         edit_source = EditSource(source)
         
@@ -207,7 +207,7 @@ async def create_edit_version(
 async def get_versions_for_file(file_path: str) -> List[EditVersionResponse]:
     """Get all versions for a specific file."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         versions = await version_manager.get_versions_for_file(file_path)
         
         return [
@@ -238,7 +238,7 @@ async def get_latest_version(
 ) -> EditVersionResponse:
     """Get the latest version of a file, optionally filtered by source."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         edit_source = EditSource(source) if source else None
         version = await version_manager.get_latest_version(file_path, edit_source)
@@ -270,7 +270,7 @@ async def get_latest_version(
 async def aggregate_edits(request: AggregateEditsRequest) -> AggregateEditsResponse:
     """Aggregate user and agent edits for a file."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         strategy = ConflictResolutionStrategy(request.strategy)
         
@@ -298,7 +298,7 @@ async def get_conflicts(
 ) -> List[EditConflictResponse]:
     """Get all conflicts, optionally filtered by file path and resolution status."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # This would need to be implemented in the version manager
         # For now, we'll return a placeholder
@@ -331,7 +331,7 @@ async def resolve_conflict(
 ) -> EditVersionResponse:
     """Manually resolve a conflict."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         resolved_version = await version_manager.resolve_conflict(
             conflict_id=conflict_id,
@@ -363,7 +363,7 @@ async def resolve_conflict(
 async def get_file_history(file_path: str) -> FileHistoryResponse:
     """Get complete history for a file."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         history = await version_manager.get_file_history(file_path)
         
         return FileHistoryResponse(
@@ -382,7 +382,7 @@ async def cleanup_old_versions(
 ) -> Dict[str, str]:
     """Clean up old versions to prevent storage bloat."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         await version_manager.cleanup_old_versions(max_versions_per_file)
         
         return {"message": f"Cleanup completed. Keeping max {max_versions_per_file} versions per file."}
@@ -401,7 +401,7 @@ async def record_user_edit(
 ) -> EditVersionResponse:
     """Record a user edit (typically called when user saves in the frontend)."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Record the edit operation
         operation = await version_manager.record_edit_operation(
@@ -452,7 +452,7 @@ async def record_unsaved_user_edit(
 ) -> Dict[str, str]:
     """Record an unsaved user edit (for real-time collaboration)."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Record the edit operation as an unsaved edit
         operation = await version_manager.record_edit_operation(
@@ -484,13 +484,10 @@ async def record_unsaved_user_edit(
 async def get_unsaved_edits(file_path: str) -> Dict[str, Any]:
     """Get any unsaved edits for a file."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Get operations marked as unsaved
-        unsaved_operations = [
-            op for op in version_manager._edit_operations.values()
-            if op.file_path == file_path and op.metadata.get("unsaved", False)
-        ]
+        unsaved_operations = version_manager.get_unsaved_for_path(file_path)
         
         return {
             "file_path": file_path,
@@ -506,22 +503,15 @@ async def get_unsaved_edits(file_path: str) -> Dict[str, Any]:
 async def clear_unsaved_edits(file_path: str) -> Dict[str, str]:
     """Clear unsaved edits for a file (when user saves or discards changes)."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Remove unsaved operations for this file
-        operations_to_remove = [
-            op_id for op_id, op in version_manager._edit_operations.items()
-            if op.file_path == file_path and op.metadata.get("unsaved", False)
-        ]
-        
-        for op_id in operations_to_remove:
-            del version_manager._edit_operations[op_id]
-        
-        await version_manager._save_edit_operations()
-        
+        operations_to_remove = [op.id for op in version_manager.get_unsaved_for_path(file_path)]
+        dropped = await version_manager.drop_operations(operations_to_remove)
+
         return {
             "status": "success",
-            "message": f"Cleared {len(operations_to_remove)} unsaved edits for {file_path}"
+            "message": f"Cleared {dropped} unsaved edits for {file_path}"
         }
         
     except Exception as e:
@@ -538,7 +528,7 @@ async def save_before_agent_operation(
 ) -> Dict[str, Any]:
     """Save current file state before agent operations to prevent data loss."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # If content is provided, use it; otherwise read from file
         if content is None:
@@ -585,7 +575,7 @@ async def restore_from_backup(
 ) -> Dict[str, str]:
     """Restore file from a backup version."""
     try:
-        version_manager = get_edit_version_manager()
+        version_manager = await get_edit_version_manager()
         
         # Find the backup version
         if backup_version_id not in version_manager._edit_versions: